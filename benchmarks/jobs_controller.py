@@ -0,0 +1,243 @@
+"""
+Benchmarks of the JobsController's hot paths: creating, listing, fetching, syncing and deleting jobs. They run
+against moto's in-process mocks of S3 and AWS Batch, so they need neither an AWS account nor network access.
+
+Every scenario creates a number of jobs of a number of frames each, then reports for every operation its wall time,
+the AWS API calls it made, and its peak memory, along with the size of the state objects. Results are written as
+JSON, so that runs can be compared to catch regressions. Peak memory includes what moto allocates to store objects.
+
+Usage, from the repository root:
+
+    pip install -r client/requirements.txt -r benchmarks/requirements.txt
+    python benchmarks/jobs_controller.py --jobs 10 --jobs 1000 --frames 1 --frames 1000 --output results.json
+"""
+
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from collections import Counter
+from contextlib import contextmanager, redirect_stdout
+from pathlib import Path
+from threading import Lock
+import importlib
+import platform
+import tempfile
+import tracemalloc
+import types
+import json
+import time
+import sys
+import os
+
+import boto3
+import moto
+import typer
+from moto import mock_aws
+
+# The add-on's entrypoint imports bpy, which only exists inside Blender, so the client's modules are loaded without it
+CLIENT_PATH = Path(__file__).resolve().parent.parent / "client" / "cloud_render"
+sys.modules["cloud_render"] = types.ModuleType("cloud_render")
+sys.modules["cloud_render"].__path__ = [str(CLIENT_PATH)]
+
+config = importlib.import_module("cloud_render.config")
+state = importlib.import_module("cloud_render.state")
+JobsController = importlib.import_module("cloud_render.jobs").JobsController
+
+# Limits of the scenarios
+MAX_JOBS = 10000
+MAX_FRAMES = 10000
+
+# Mocked AWS resources
+REGION = "us-east-1"
+COMPUTE_ENVIRONMENT = "cloud-render-benchmark"
+
+
+class ApiCalls:
+    """Counter of the AWS API calls made by boto3 clients, by service and operation"""
+
+    def __init__(self, *clients: Any):
+        self.counts: Counter = Counter()
+        self.lock = Lock()
+
+        for client in clients:
+            client.meta.events.register("before-call.*.*", self.count)
+
+    def count(self, event_name: str, **_) -> None:
+        """Count a call, from the name of the event botocore emits before making it"""
+
+        with self.lock:
+            self.counts[event_name[len("before-call.") :]] += 1
+
+    def snapshot(self) -> Counter:
+        """Copy of the current counts"""
+
+        with self.lock:
+            return Counter(self.counts)
+
+
+@contextmanager
+def measure(calls: ApiCalls, count: int, trace_memory: bool) -> Iterator[Dict[str, Any]]:
+    """
+    Measure an operation repeated a number of times, yielding the dict its results are recorded in once it exits.
+    Whatever the controller logs is discarded, so that it doesn't weigh on the timings.
+    """
+
+    result: Dict[str, Any] = dict(count=count)
+    before = calls.snapshot()
+    if trace_memory:
+        tracemalloc.start()
+
+    start_time = time.perf_counter()
+    with open(os.devnull, "w", encoding="utf-8") as devnull, redirect_stdout(devnull):
+        yield result
+
+    result["seconds"] = time.perf_counter() - start_time
+    result["seconds_per_call"] = result["seconds"] / max(count, 1)
+    result["api_calls"] = dict(sorted((calls.snapshot() - before).items()))
+    if trace_memory:
+        result["peak_memory_bytes"] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+
+def create_resources() -> None:
+    """Create the bucket, job queues and job definitions of a render farm, as deployed by the add-on's template"""
+
+    boto3.client("s3").create_bucket(Bucket=config.BUCKET_NAME)
+
+    role = boto3.client("iam").create_role(RoleName=COMPUTE_ENVIRONMENT, AssumeRolePolicyDocument="{}")["Role"]
+    batch_client = boto3.client("batch")
+    environment = batch_client.create_compute_environment(
+        computeEnvironmentName=COMPUTE_ENVIRONMENT, type="UNMANAGED", state="ENABLED", serviceRole=role["Arn"]
+    )
+
+    for queue in (config.JOB_QUEUE_CPU, config.JOB_QUEUE_GPU):
+        batch_client.create_job_queue(
+            jobQueueName=queue,
+            state="ENABLED",
+            priority=1,
+            computeEnvironmentOrder=[dict(order=1, computeEnvironment=environment["computeEnvironmentArn"])],
+        )
+
+    for definition in (config.JOB_DEF_CPU, config.JOB_DEF_GPU):
+        batch_client.register_job_definition(
+            jobDefinitionName=definition,
+            type="container",
+            containerProperties=dict(image="cloud-render-server", vcpus=1, memory=1024, command=["Ref::job"]),
+        )
+
+
+def seed_outputs(s3_client: Any, job_id: str, frame_count: int, output_size: int) -> None:
+    """Store an output file for every frame of a job, as render containers would"""
+
+    body = os.urandom(output_size)
+    for frame in range(1, frame_count + 1):
+        s3_client.put_object(Bucket=config.BUCKET_NAME, Key=f"jobs/{job_id}/out/frame_{frame:04d}.png", Body=body)
+
+
+def state_sizes(bucket: Any) -> Dict[str, Any]:
+    """Size of the jobs index, and of the state object of every job"""
+
+    sizes = {obj.key: obj.size for obj in bucket.objects.all()}
+    job_sizes = [size for key, size in sizes.items() if key.endswith(f"/{config.JOB_STATE_FILE}")]
+
+    return dict(
+        index_bytes=sizes.get(config.JOBS_INDEX_FILE, 0),
+        job_bytes_mean=sum(job_sizes) / max(len(job_sizes), 1),
+        job_bytes_max=max(job_sizes, default=0),
+    )
+
+
+def run_scenario(  # pylint: disable=too-many-arguments,too-many-locals
+    job_count: int, frame_count: int, sample_count: int, blend_path: str, output_size: int, trace_memory: bool
+) -> Dict[str, Any]:
+    """
+    Run every operation against fresh mocks: create every job, list them, then fetch, sync and delete a sample of
+    them. The controller's on-disk state cache starts empty too.
+    """
+
+    with mock_aws(config={"batch": {"use_docker": False}}), tempfile.TemporaryDirectory() as tmp_dir:
+        state.cache_path = Path(tmp_dir) / "state_cache"
+        create_resources()
+
+        s3_client, batch_client = boto3.client("s3"), boto3.client("batch")
+        bucket = boto3.resource("s3").Bucket(config.BUCKET_NAME)
+        calls = ApiCalls(s3_client, batch_client, bucket.meta.client)
+        controller = JobsController(s3_client, bucket, batch_client)
+        operations: Dict[str, Dict[str, Any]] = {}
+
+        def run(name: str, count: int, operation: Callable[[], Any]) -> Any:
+            with measure(calls, count, trace_memory) as operations[name]:
+                return operation()
+
+        # Create every job, then sample them evenly
+        jobs = run(
+            "create_job",
+            job_count,
+            lambda: [controller.create_job(blend_path, 1, frame_count) for _ in range(job_count)],
+        )
+        sample = [jobs[i * len(jobs) // sample_count] for i in range(min(sample_count, len(jobs)))]
+        sizes = state_sizes(bucket)
+
+        run("list_jobs", 1, controller.list_jobs)
+        run("get_job", len(sample), lambda: [controller.get_job(job.job_id) for job in sample])
+
+        # Sync every job's outputs to a directory of its own
+        for job in sample:
+            seed_outputs(s3_client, job.job_id, frame_count, output_size)
+
+        run(
+            "sync_files",
+            len(sample),
+            lambda: [controller.sync_files(job, str(Path(tmp_dir) / "out" / job.job_id)) for job in sample],
+        )
+        run("delete_job", len(sample), lambda: [controller.delete_job(job) for job in sample])
+
+    return dict(jobs=job_count, frames=frame_count, sampled_jobs=len(sample), state=sizes, operations=operations)
+
+
+def main(  # pylint: disable=too-many-arguments
+    jobs: List[int] = typer.Option([10], min=1, max=MAX_JOBS, help="Number of jobs of a scenario. Can be repeated."),
+    frames: List[int] = typer.Option(
+        [1, 100], min=1, max=MAX_FRAMES, help="Number of frames of every job of a scenario. Can be repeated."
+    ),
+    sample: int = typer.Option(10, min=1, help="Number of jobs fetched, synced and deleted by every scenario."),
+    blend_kb: int = typer.Option(1024, min=1, help="Size of the blend file every job uploads."),
+    output_kb: int = typer.Option(4, min=1, help="Size of every frame's output file."),
+    memory: bool = typer.Option(True, help="Trace peak memory, which slows every operation down."),
+    output: Optional[Path] = typer.Option(None, help="File to write the results to, instead of standard output."),
+):
+    """Run a scenario for every combination of job and frame counts, and report their results as JSON"""
+
+    os.environ.setdefault("AWS_DEFAULT_REGION", REGION)
+
+    results = dict(
+        environment=dict(
+            python=platform.python_version(),
+            platform=platform.platform(),
+            boto3=boto3.__version__,
+            moto=moto.__version__,
+            started_at=time.time(),
+        ),
+        parameters=dict(sample=sample, blend_kb=blend_kb, output_kb=output_kb, memory=memory),
+        scenarios=[],
+    )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Every job uploads the same blend file, so only the first one uploads its chunks
+        blend_path = str(Path(tmp_dir) / "benchmark.blend")
+        with open(blend_path, "wb") as blend_file:
+            blend_file.write(os.urandom(blend_kb * 1024))
+
+        for job_count in jobs:
+            for frame_count in frames:
+                typer.echo(f"Running {job_count} jobs of {frame_count} frames...", err=True)
+                scenario = run_scenario(job_count, frame_count, sample, blend_path, output_kb * 1024, memory)
+                results["scenarios"].append(scenario)
+
+    report = json.dumps(results, indent=2)
+    if output is None:
+        typer.echo(report)
+    else:
+        output.write_text(report, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    typer.run(main)
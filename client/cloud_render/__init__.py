@@ -37,6 +37,7 @@ dependencies = (
     Dependency(module="mypy_boto3_batch", package="boto3-stubs[batch]", name=None),
     Dependency(module="pydantic", package=None, name=None),
     Dependency(module="typer", package=None, name=None),
+    Dependency(module="zstandard", package=None, name=None),
 )
 
 DEPENDENCIES_INSTALLED = False
@@ -1,29 +1,69 @@
 """
 CLI entrypoint for the cloud-render client. This is helpful for testing without using the blender UI itself.
 """
+import cProfile
+import pstats
+import sys
 import os
+import time
 
 import typer
 import boto3
 
 from .deploy import StackManager
 from .jobs import JobsController
-from .config import BUCKET_NAME
+from .config import BUCKET_NAME, FOLLOW_INTERVAL, PROFILE_ROWS
+from .profiling import api_stats
+from .transfer import MB
 
 # Init typer
 app = typer.Typer()
 
-# Initialize stack manager
-cf_client = boto3.client("cloudformation")
+# Initialize stack manager, recording the calls of every AWS client
+cf_client = api_stats.instrument(boto3.client("cloudformation"))
 bucket = boto3.resource("s3").Bucket(BUCKET_NAME)
+api_stats.instrument(bucket.meta.client)
 stack_manager = StackManager(cf_client, bucket)
 
 # Initialize jobs controller
-s3_client = boto3.client("s3")
-batch_client = boto3.client("batch")
+s3_client = api_stats.instrument(boto3.client("s3"))
+batch_client = api_stats.instrument(boto3.client("batch"))
 jobs_controller = JobsController(s3_client, bucket, batch_client)
 
 
+def print_profile(profiler: cProfile.Profile) -> None:
+    """Print the AWS calls made by the command and where its Python code spent its time, to standard error"""
+
+    profiler.disable()
+
+    typer.echo("\nAWS calls:", err=True)
+    typer.echo("OPERATION\t\t\tCALLS\tP50\tP95\tRETRIES\tTHROTTLES\tERRORS\tSENT\t\tRECEIVED", err=True)
+    for name, stats in sorted(api_stats.operations.items()):
+        typer.echo(
+            f"{name.ljust(30)}\t{stats.calls}\t{stats.percentile(50):.3f}s\t{stats.percentile(95):.3f}s\t"
+            f"{stats.retries}\t{stats.throttles}\t\t{stats.errors}\t"
+            f"{stats.bytes_sent / MB:.1f} MB\t\t{stats.bytes_received / MB:.1f} MB",
+            err=True,
+        )
+
+    # Only the main thread is profiled, so time spent in worker threads shows up as waiting on them
+    typer.echo("\nPython profile:", err=True)
+    pstats.Stats(profiler, stream=sys.stderr).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(PROFILE_ROWS)
+
+
+@app.callback()
+def main(
+    ctx: typer.Context,
+    profile: bool = typer.Option(False, help="Print the AWS calls made by the command and a profile of it on exit."),
+):
+    """Manage the cloud-render farm and its jobs."""
+
+    if profile:
+        profiler = cProfile.Profile()
+        ctx.call_on_close(lambda: print_profile(profiler))
+        profiler.enable()
+
+
 # Define commands
 @app.command()
 def deploy():
@@ -62,11 +102,22 @@ def destroy():
 
 
 @app.command()
-def create_job(
+def create_job(  # pylint: disable=too-many-arguments
     blend_path: str = typer.Argument(..., help="Path to blend file to upload"),
     start_frame: int = typer.Option(0, help="Starting frame."),
     end_frame: int = typer.Option(0, help="Starting frame."),
     gpu: bool = typer.Option(False, help="Use GPU or not"),
+    array: bool = typer.Option(True, help="Submit frames as an AWS Batch array job instead of one job per chunk."),
+    chunk_size: int = typer.Option(1, min=1, help="Number of consecutive frames rendered by each container."),
+    compress: bool = typer.Option(True, help="Compress the uploaded blend file with zstd."),
+    tiles_x: int = typer.Option(1, min=1, help="Number of columns of tiles to split a single frame into."),
+    tiles_y: int = typer.Option(1, min=1, help="Number of rows of tiles to split a single frame into."),
+    sample_splits: int = typer.Option(
+        1,
+        min=1,
+        help="Number of containers to split the Cycles samples of a single frame across. "
+        "The scene must not use denoising, compositing nodes or sequencer strips.",
+    ),
 ):
     """Create a new render job."""
 
@@ -75,8 +126,36 @@ def create_job(
         typer.echo(f"No blend file found at path '{blend_path}'")
         typer.Exit(1)
 
-    # Create job
-    jobs_controller.create_job(blend_path, start_frame, end_frame, gpu)
+    # Create job, showing the upload's progress
+    with typer.progressbar(length=os.path.getsize(blend_path), label="Uploading") as progress_bar:
+
+        # Only the chunks of the blend file that are not stored yet are uploaded
+        def progress(done: int, total: int) -> None:
+            progress_bar.length = total
+            progress_bar.update(done - progress_bar.pos)
+
+        jobs_controller.create_job(
+            blend_path,
+            start_frame,
+            end_frame,
+            gpu,
+            array,
+            chunk_size,
+            progress,
+            compress=compress,
+            tiles=(tiles_x, tiles_y),
+            sample_splits=sample_splits,
+        )
+
+
+@app.command()
+def resume_job(job_id: str = typer.Argument(...)):
+    """Submit the missing batch jobs of a job whose submission was interrupted"""
+
+    job = jobs_controller.resume_job(job_id)
+
+    if job is None:
+        typer.echo(f"No job found with id: {job_id}", color=typer.colors.RED)
 
 
 @app.command()
@@ -94,7 +173,10 @@ def list_jobs():
 
 
 @app.command()
-def describe_job(job_id: str = typer.Argument(...)):
+def describe_job(
+    job_id: str = typer.Argument(...),
+    timings: bool = typer.Option(False, help="Show how long every phase of the job's batch jobs took."),
+):
     """Fetch details on a specific job"""
 
     job = jobs_controller.get_job(job_id)
@@ -113,10 +195,71 @@ def describe_job(job_id: str = typer.Argument(...)):
 
     typer.echo(f"Frames: {job.start_frame}-{job.end_frame}")
 
+    if job.tile_count > 1:
+        typer.echo(f"Tiles: {job.tiles_x}x{job.tiles_y}")
+
+    if job.sample_splits > 1:
+        typer.echo(f"Sample splits: {job.sample_splits}")
+
+    if job.blend_hash is not None:
+        typer.echo(f"Blend file: {job.blend_hash}")
+
+    # Show the progress of running batch jobs, from the latest heartbeat they published
+    progress = jobs_controller.get_progress(job)
+
     typer.echo("\nBatch Jobs:")
-    typer.echo("FRAME\tSTATUS\t\tJOB_NAME")
-    for batch_job in job.children.values():
-        typer.echo(f"{batch_job.frame}\t{batch_job.status.ljust(10)}\t{batch_job.name}")
+    typer.echo("FRAMES\t\tSTATUS\t\tJOB_NAME\t\t\t\tPROGRESS")
+    for frame, batch_job in job.children.items():
+        frames = f"{batch_job.frame}-{batch_job.end_frame}"
+        frame_progress = progress[frame].describe() if frame in progress else ""
+        typer.echo(f"{frames.ljust(10)}\t{batch_job.status.ljust(10)}\t{batch_job.name.ljust(30)}\t{frame_progress}")
+
+    if not timings:
+        return
+
+    # Show where the time went, from the timings recorded by every batch job that ran
+    typer.echo("\nTimings:")
+    typer.echo("PHASE\t\tRUNS\tTOTAL\t\tMEAN\t\tSLOWEST\t\tCOUNTS")
+    for phase, phase_timings in jobs_controller.get_timings(job).items():
+        counts = ", ".join(
+            f"{value / MB:.1f} MB" if key == "bytes" else f"{value} {key.replace('_', ' ')}"
+            for key, value in phase_timings.counts.items()
+        )
+        typer.echo(
+            f"{phase.ljust(15)}\t{len(phase_timings.seconds)}\t{phase_timings.total:.1f}s\t\t"
+            f"{phase_timings.mean:.1f}s\t\t{phase_timings.slowest:.1f}s\t\t{counts}"
+        )
+
+
+@app.command()
+def sync_files(
+    job_id: str = typer.Argument(...),
+    output_path: str = typer.Argument(..., help="Directory to save the job's output files to"),
+    follow: bool = typer.Option(False, help="Keep downloading new frames as they finish, until the job stops."),
+    interval: int = typer.Option(FOLLOW_INTERVAL, min=1, help="Seconds between polls when following."),
+):
+    """Download a specific job's output files, skipping files that are unchanged"""
+
+    job = jobs_controller.get_job(job_id)
+
+    if job is None:
+        typer.echo(f"No job found with id: {job_id}", color=typer.colors.RED)
+        raise typer.Exit(1)
+
+    if not follow:
+        jobs_controller.sync_files(job, output_path)
+        return
+
+    # Poll until the job stops running
+    for result in jobs_controller.follow_files(job, output_path):
+        if not result.following:
+            typer.echo(
+                f"Job {job.job_id} stopped. Downloaded {result.downloaded} files ({result.throughput:.1f} MB/s), "
+                f"skipped {result.skipped} unchanged files"
+            )
+            break
+
+        time.sleep(interval)
 
 
 @app.command()
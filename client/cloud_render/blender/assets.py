@@ -0,0 +1,82 @@
+"""
+Collect the external files a blend file depends on, so they can be uploaded along with it.
+"""
+from typing import List
+import os
+import re
+
+import bpy
+
+from ..blends import Dependency
+
+# Tokens Blender replaces with the number of each UDIM tile
+TILE_TOKENS = {"<UDIM>": r"\d+", "<UVTILE>": r"u\d+_v\d+"}
+
+
+def sequence_files(path: str) -> List[str]:
+    """List the files of an image sequence or UDIM tile set, given the path of any of them or its pattern"""
+
+    directory, name = os.path.split(path)
+    if not os.path.isdir(directory):
+        return []
+
+    # Match any tile number, or else any frame number in place of the last number of the name
+    pattern = re.escape(name)
+    for token, regex in TILE_TOKENS.items():
+        pattern = pattern.replace(re.escape(token), regex)
+
+    if pattern == re.escape(name):
+        pattern = re.sub(r"\d+(?=\D*$)", lambda _: r"\d+", pattern)
+
+    return sorted(
+        os.path.join(directory, file_name) for file_name in os.listdir(directory) if re.fullmatch(pattern, file_name)
+    )
+
+
+def is_sequence(datablock: bpy.types.ID) -> bool:
+    """Whether a datablock's path refers to a sequence of files"""
+
+    if isinstance(datablock, bpy.types.Image):
+        return datablock.source in ("SEQUENCE", "TILED")
+
+    if isinstance(datablock, bpy.types.MovieClip):
+        return datablock.source == "SEQUENCE"
+
+    return getattr(datablock, "is_sequence", False)
+
+
+def collect_dependencies() -> List[Dependency]:
+    """
+    Collect the external files referenced by the open blend file: images, movie clips, fonts, linked libraries,
+    Alembic/USD caches and OpenVDB volumes. Packed and generated data is stored in the blend file itself.
+    """
+
+    datablocks = [
+        *(image for image in bpy.data.images if image.source in ("FILE", "SEQUENCE", "TILED", "MOVIE")),
+        *bpy.data.movieclips,
+        *(font for font in bpy.data.fonts if font.filepath != "<builtin>"),
+        *bpy.data.libraries,
+        *bpy.data.cache_files,
+        *bpy.data.volumes,
+    ]
+
+    dependencies = []
+    for datablock in datablocks:
+        if not datablock.filepath or getattr(datablock, "packed_file", None) is not None:
+            continue
+
+        # Libraries are relative to the library that links them, other datablocks to the library they come from
+        library = datablock.parent if isinstance(datablock, bpy.types.Library) else datablock.library
+        path = os.path.normpath(bpy.path.abspath(datablock.filepath, library=library))
+
+        files = sequence_files(path) if is_sequence(datablock) else [path]
+        dependencies.append(
+            Dependency(
+                filepath=datablock.filepath,
+                path=path,
+                files=[file for file in files if os.path.isfile(file)],
+                linked=library is not None,
+            )
+        )
+
+    return dependencies
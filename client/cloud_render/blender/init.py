@@ -9,6 +9,7 @@ from ..creds import load_creds
 from ..deploy import StackManager
 from ..jobs import JobsController
 from ..config import BUCKET_NAME
+from ..profiling import api_stats
 
 stack_manager: Optional[StackManager] = None
 jobs_controller: Optional[JobsController] = None
@@ -30,12 +31,10 @@ def init_jobs_controller() -> JobsController:
         region_name=region,
     )
 
-    s3_client = boto3.client(
-        "s3",
-        **common_args,
-    )
+    s3_client = api_stats.instrument(boto3.client("s3", **common_args))
     bucket = boto3.resource("s3", **common_args).Bucket(BUCKET_NAME)
-    batch_client = boto3.client("batch", **common_args)
+    api_stats.instrument(bucket.meta.client)
+    batch_client = api_stats.instrument(boto3.client("batch", **common_args))
 
     jobs_controller = JobsController(s3_client, bucket, batch_client)
 
@@ -58,8 +57,9 @@ def init_stack_manager() -> StackManager:
         region_name=region,
     )
 
-    cf_client = boto3.client("cloudformation", **common_args)
+    cf_client = api_stats.instrument(boto3.client("cloudformation", **common_args))
     bucket = boto3.resource("s3", **common_args).Bucket(BUCKET_NAME)
+    api_stats.instrument(bucket.meta.client)
     stack_manager = StackManager(cf_client, bucket)
 
     return stack_manager
@@ -1,27 +1,33 @@
 """
 UI components for managing existing render jobs.
 """
-from typing import Optional
+from typing import Dict, Iterator, Optional
 from pathlib import Path
 
 from bpy.types import PropertyGroup, Panel, UIList, Operator
-from bpy.props import StringProperty, CollectionProperty, IntProperty, PointerProperty
+from bpy.props import StringProperty, CollectionProperty, IntProperty, PointerProperty, BoolProperty
 import bpy
 
 from ...creds import valid_creds
-from ...config import STATUS_ERROR, STATUS_SUCCEEDED
+from ...config import STATUS_ERROR, STATUS_SUCCEEDED, FOLLOW_INTERVAL
 from ...jobs import Job
+from ...models import FrameProgress
+from ...transfer import SyncResult
 from ..init import init_jobs_controller
 from ..base import CloudRender_BasePanel
 from ..render_farm import CREATE_COMPLETE, UPDATE_COMPLETE
 
 last_id: Optional[str] = None
 cur_job: Optional[Job] = None
+cur_progress: Dict[int, FrameProgress] = {}
+
+# Number of running batch jobs whose progress is shown
+PROGRESS_ROWS = 10
 
 
 def job_handler(_, context):
     """Handle changes to the active job"""
-    global cur_job
+    global cur_job, cur_progress
     scene = context.scene
 
     # Ensure there is a selected job
@@ -35,6 +41,7 @@ def job_handler(_, context):
         jobs_controller = init_jobs_controller()
 
         cur_job = jobs_controller.get_job(cur_item.id)
+        cur_progress = jobs_controller.get_progress(cur_job) if cur_job is not None else {}
 
 
 class CloudRender_SyncJobProps(PropertyGroup):
@@ -48,6 +55,12 @@ class CloudRender_SyncJobProps(PropertyGroup):
         subtype="DIR_PATH",
     )
 
+    follow: BoolProperty(
+        name="Follow",
+        description="Keep downloading new frames as they finish, until the job stops running.",
+        default=False,
+    )
+
 
 class CloudRender_OT_SyncJobFiles(Operator):
     """Operator that will sync a cloud render job's files locally"""
@@ -56,6 +69,10 @@ class CloudRender_OT_SyncJobFiles(Operator):
     bl_label = "Download Files"
     bl_description = "Download job output files to local disk."
 
+    # State while following a running job
+    _follow: Optional[Iterator[SyncResult]] = None
+    _timer = None
+
     @classmethod
     def poll(cls, context):
         """Validate operator conditions."""
@@ -81,10 +98,48 @@ class CloudRender_OT_SyncJobFiles(Operator):
         active_job = scene.jobs_list[scene.jobs_index]
         job = jobs_controller.get_job(active_job.id)
 
+        # Keep polling for new frames in the background while following
+        if scene.sync_inputs.follow:
+            self._follow = jobs_controller.follow_files(job, output_path)
+            if not self._poll():
+                return {"FINISHED"}
+
+            self._timer = context.window_manager.event_timer_add(FOLLOW_INTERVAL, window=context.window)
+            context.window_manager.modal_handler_add(self)
+
+            return {"RUNNING_MODAL"}
+
         # Sync files
-        jobs_controller.sync_files(job, output_path)
+        result = jobs_controller.sync_files(job, output_path)
+
+        self.report(
+            {"INFO"},
+            f"Synced files to {output_path}: downloaded {result.downloaded} ({result.throughput:.1f} MB/s), "
+            f"skipped {result.skipped} unchanged.",
+        )
+
+        return {"FINISHED"}
+
+    def _poll(self) -> bool:
+        """Download the frames that finished since the last poll, return whether to keep following"""
+
+        result = next(self._follow)
+        self.report({"INFO"}, f"Downloaded {result.downloaded} files, skipped {result.skipped} unchanged.")
 
-        self.report({"INFO"}, f"Synced files to {output_path}.")
+        return result.following
+
+    def modal(self, context, event):
+        """Poll for new frames on every timer event, until the job stops or ESC is pressed."""
+
+        if event.type == "ESC":
+            context.window_manager.event_timer_remove(self._timer)
+            return {"CANCELLED"}
+
+        if event.type != "TIMER" or self._poll():
+            return {"PASS_THROUGH"}
+
+        context.window_manager.event_timer_remove(self._timer)
+        self.report({"INFO"}, "Job stopped running, done following.")
 
         return {"FINISHED"}
 
@@ -257,11 +312,11 @@ class CloudRender_PT_ManageJobsPanel(CloudRender_BasePanel, Panel):
 
         for batch_job in cur_job.children.values():
             if batch_job.status == "RUNNING":
-                running_frames += 1
+                running_frames += batch_job.frame_count
             elif batch_job.status == "SUCCEEDED":
-                finished_frames += 1
+                finished_frames += batch_job.frame_count
             elif batch_job.status == "FAILED":
-                failed_frames += 1
+                failed_frames += batch_job.frame_count
 
         labels_col.label(text="Completed Frames:")
         values_col.label(text=f"{finished_frames}/{total_frames}")
@@ -269,16 +324,28 @@ class CloudRender_PT_ManageJobsPanel(CloudRender_BasePanel, Panel):
         labels_col.label(text="Failed Frames:")
         values_col.label(text=f"{failed_frames}/{total_frames}")
 
-        labels_col.label(text="Running Frames:")
-        values_col.label(text=f"{running_frames}")
+        self.draw_running(labels_col, values_col, running_frames)
 
         # Sync files operator
         props = scene.sync_inputs
-        row = self.layout.row()
+        self.layout.row().prop(props, "follow")
         split = self.layout.row().split(factor=0.5)
         split.column().prop(props, "output_path", text="Output Path")
         split.column().operator(CloudRender_OT_SyncJobFiles.bl_idname, icon="TRIA_DOWN_BAR")
 
+    @staticmethod
+    def draw_running(labels_col, values_col, running_frames: int):
+        """Render the running frames of the current job, with their progress as of their latest heartbeat"""
+
+        labels_col.label(text="Running Frames:")
+        values_col.label(text=f"{running_frames}")
+
+        for frame, frame_progress in list(cur_progress.items())[:PROGRESS_ROWS]:
+            batch_job = cur_job.children[frame]
+            frames = str(frame) if batch_job.frame_count == 1 else f"{frame}-{batch_job.end_frame}"
+            labels_col.label(text=f"Frame {frames}:")
+            values_col.label(text=frame_progress.describe())
+
 
 class CloudRender_JobListItem(PropertyGroup):
     """Group of properties representing a job in the list."""
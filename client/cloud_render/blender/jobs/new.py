@@ -1,15 +1,38 @@
 """
 UI components for creating new render jobs.
 """
+from typing import List
+import tempfile
+import os
+
 from bpy.types import Panel, Operator, PropertyGroup
-from bpy.props import BoolProperty, PointerProperty
+from bpy.props import BoolProperty, IntProperty, PointerProperty
 import bpy
 
+from ... import blends
 from ...creds import valid_creds
+from ..assets import collect_dependencies
 from ..init import init_jobs_controller
 from ..base import CloudRender_BasePanel
 from ..render_farm import CREATE_COMPLETE, UPDATE_COMPLETE
 
+# Compositor nodes that pass the render through unchanged
+PASSTHROUGH_NODES = ("R_LAYERS", "COMPOSITE", "VIEWER")
+
+
+def post_processing(scene) -> List[str]:
+    """Steps applied to a scene's renders after sampling, which render hosts can't apply to averaged partial renders"""
+
+    compositing = scene.use_nodes and scene.render.use_compositing
+    sequencer = scene.render.use_sequencer and scene.sequence_editor is not None
+    used = {
+        "denoising": scene.cycles.use_denoising,
+        "compositing": compositing and any(node.type not in PASSTHROUGH_NODES for node in scene.node_tree.nodes),
+        "the sequencer": sequencer and len(scene.sequence_editor.sequences_all) > 0,
+    }
+
+    return [step for step, is_used in used.items() if is_used]
+
 
 class CloudRender_CloudCreateJobProps(PropertyGroup):
     """Properties for credentials inputs"""
@@ -18,6 +41,38 @@ class CloudRender_CloudCreateJobProps(PropertyGroup):
         name="Render Animation",
         description="If true, render entire animation. Otherwise, render the current frame.",
     )
+    chunk_size: IntProperty(
+        name="Frames per Job",
+        description="Number of consecutive frames rendered by each batch job. Helps when frames render quickly.",
+        default=1,
+        min=1,
+    )
+    tiles_x: IntProperty(
+        name="Tiles X",
+        description="Number of columns of tiles the frame is split into, each rendered by a separate batch job",
+        default=1,
+        min=1,
+        max=16,
+    )
+    tiles_y: IntProperty(
+        name="Tiles Y",
+        description="Number of rows of tiles the frame is split into, each rendered by a separate batch job",
+        default=1,
+        min=1,
+        max=16,
+    )
+    sample_splits: IntProperty(
+        name="Sample Splits",
+        description="Number of batch jobs the Cycles samples of the frame are split across, each with its own seed",
+        default=1,
+        min=1,
+        max=16,
+    )
+    compress: BoolProperty(
+        name="Compress Upload",
+        description="Compress the blend file and its external files with zstd before uploading them",
+        default=True,
+    )
 
 
 class CloudRender_OT_CreateJob(Operator):
@@ -25,7 +80,7 @@ class CloudRender_OT_CreateJob(Operator):
 
     bl_idname = "render.create_cloud_render_job"
     bl_label = "Create Job"
-    bl_description = "Pack resources and upload blend file to the cloud"
+    bl_description = "Upload blend file and the external files it uses to the cloud"
 
     @classmethod
     def poll(cls, _):
@@ -40,23 +95,61 @@ class CloudRender_OT_CreateJob(Operator):
 
         scene = context.scene
 
-        # Pack resources
-        bpy.ops.file.pack_all()
-        file_path = bpy.data.filepath
-
-        # Save file
-        bpy.ops.wm.save_mainfile()
-
-        # Set start and end frames
+        # Set start and end frames. Single frames can be split into tiles, or by samples when rendered with Cycles
         props = scene.CloudCreateJobProps
         if props.animation:
             start_frame, end_frame = scene.frame_start, scene.frame_end
+            tiles, sample_splits = (1, 1), 1
 
         if not props.animation:
             start_frame, end_frame = scene.frame_current, scene.frame_current
-
-        # Create the job (GPU disabled for now)
-        jobs_controller.create_job(file_path, start_frame, end_frame)
+            tiles = (props.tiles_x, props.tiles_y)
+            sample_splits = props.sample_splits if scene.render.engine == "CYCLES" else 1
+
+        if tiles != (1, 1) and sample_splits > 1:
+            self.report({"ERROR"}, "Frames can be split into tiles or by samples, not both")
+            return {"CANCELLED"}
+
+        # Partial renders are averaged as sampled, so the frame would silently lack any post-processing
+        steps = post_processing(scene) if sample_splits > 1 else []
+        if steps:
+            self.report({"ERROR"}, f"Frames using {' and '.join(steps)} can't be split by samples, use tiles instead")
+            return {"CANCELLED"}
+
+        # Chunks are uploaded uncompressed without zstandard, which older installs of the dependencies lack
+        if props.compress and blends.zstandard is None:
+            self.report({"WARNING"}, "zstandard is not installed, uploading uncompressed files")
+
+        # Create the job (GPU disabled for now), showing the upload's progress in the status bar
+        window_manager = context.window_manager
+        window_manager.progress_begin(0, 100)
+
+        def progress(done: int, total: int) -> None:
+            window_manager.progress_update(100 * done // max(total, 1))
+            context.workspace.status_text_set(f"Uploading blend file: {done // 1024**2}/{total // 1024**2} MB")
+
+        # Save a copy of the file, leaving the user's file untouched. Its relative paths are kept relative to the
+        # user's file, which render hosts lay out the external files around
+        try:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                copy_path = os.path.join(tmp_dir, bpy.path.basename(bpy.data.filepath))
+                bpy.ops.wm.save_as_mainfile(filepath=copy_path, copy=True, relative_remap=False)
+
+                jobs_controller.create_job(
+                    copy_path,
+                    start_frame,
+                    end_frame,
+                    chunk_size=props.chunk_size,
+                    progress=progress,
+                    source_path=bpy.data.filepath,
+                    dependencies=collect_dependencies(),
+                    compress=props.compress,
+                    tiles=tiles,
+                    sample_splits=sample_splits,
+                )
+        finally:
+            window_manager.progress_end()
+            context.workspace.status_text_set(None)
 
         if start_frame == end_frame:
             self.report({"INFO"}, f"Created render job for single frame #{start_frame}")
@@ -100,6 +193,22 @@ class CloudRender_PT_NewJobPanel(CloudRender_BasePanel, Panel):
         inputs_col = split.column()
         inputs_col.prop(props, "animation", text="")
 
+        if props.animation:
+            labels_col.label(text="Frames per Job")
+            inputs_col.prop(props, "chunk_size", text="")
+        else:
+            labels_col.label(text="Tiles")
+            row = inputs_col.row(align=True)
+            row.prop(props, "tiles_x", text="X")
+            row.prop(props, "tiles_y", text="Y")
+
+            if scene.render.engine == "CYCLES":
+                labels_col.label(text="Sample Splits")
+                inputs_col.prop(props, "sample_splits", text="")
+
+        labels_col.label(text="Compress Upload")
+        inputs_col.prop(props, "compress", text="")
+
         row = self.layout.row()
         row.operator(CloudRender_OT_CreateJob.bl_idname, text="Create job")
 
@@ -0,0 +1,362 @@
+"""
+Logic pertaining to storing blend files, and the files they depend on, in S3 by their content.
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import PurePath
+import hashlib
+
+from mypy_boto3_s3 import S3Client
+from pydantic import BaseModel
+import botocore
+import typer
+
+from .chunking import chunk_file
+from .config import BUCKET_NAME, BLOBS_DIR, CHUNKS_DIR, MANIFESTS_DIR, PACKAGES_DIR, CHUNK_WORKERS, COMPRESSION_LEVEL
+from .state import StateStore
+from .transfer import MB, Progress
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# SHA-256 and size of every chunk of a file, in order
+Chunks = List[Tuple[str, int]]
+
+
+class Dependency(BaseModel):
+    """Data model of an external file, or sequence of files, referenced by a blend file"""
+
+    filepath: str  # Path as stored in the blend file, possibly relative (//) to it
+    path: str  # Absolute path on this machine
+    files: List[str]  # Files on disk, more than one for image sequences and UDIM tiles
+    linked: bool = False  # Whether it is referenced from a linked library, so its path can't be remapped
+
+
+class Asset(BaseModel):
+    """Data model of a file stored along with a blend file"""
+
+    path: str  # Where the file is laid out on render hosts, relative to the job's directory
+    sha256: str
+    size: int
+
+
+class Package(BaseModel):
+    """Data model of a blend file and every external file it depends on"""
+
+    blend_path: str  # Where the blend file is laid out on render hosts, relative to the job's directory
+    blend_hash: str
+    assets: List[Asset] = []
+    remap: Dict[str, str] = {}  # Absolute paths stored in the blend file, and where they are laid out instead
+
+    @property
+    def package_hash(self) -> str:
+        """SHA-256 of the package, under which it is stored"""
+
+        return hashlib.sha256(bytes(self.json(sort_keys=True), "utf-8")).hexdigest()
+
+    @property
+    def files(self) -> Set[str]:
+        """SHA-256 of every file of the package"""
+
+        return {self.blend_hash} | {asset.sha256 for asset in self.assets}
+
+
+def mirror_path(path: str) -> str:
+    """
+    Path under which a file is laid out on render hosts: its absolute path, made relative. Laying out every file this
+    way keeps relative paths between them valid, such as the // paths stored in blend files.
+    """
+
+    pure = PurePath(path)
+    drive = pure.drive.replace(":", "").strip("\\/").replace("\\", "/")
+
+    return "/".join(part for part in [drive, *pure.parts[1:]] if part)
+
+
+class BlendStore:
+    """
+    The BlendStore stores blend files by the SHA-256 of their content.
+
+    Blend files are split into content-defined chunks, stored at chunks/<sha256>, and listed in order by a manifest at
+    manifests/<sha256>.json. Chunks shared by several blend files, such as packed textures that did not change
+    between two versions of a file, are only uploaded once.
+
+    The external files a blend file depends on, such as textures and linked libraries, are stored the same way. A
+    package at packages/<sha256>.json lists them along with the blend file, so that render hosts can lay them out
+    like they are on the machine that created the job.
+    """
+
+    s3_client: S3Client
+    store: StateStore
+
+    def __init__(self, s3_client: S3Client, store: StateStore):
+        self.s3_client = s3_client
+        self.store = store
+
+    @staticmethod
+    def manifest_key(blend_hash: str) -> str:
+        """Key of the manifest of a blend file"""
+
+        return f"{MANIFESTS_DIR}/{blend_hash}.json"
+
+    @staticmethod
+    def chunk_key(chunk_hash: str) -> str:
+        """Key of a chunk of a blend file"""
+
+        return f"{CHUNKS_DIR}/{chunk_hash}"
+
+    @staticmethod
+    def package_key(package_hash: str) -> str:
+        """Key of a package"""
+
+        return f"{PACKAGES_DIR}/{package_hash}.json"
+
+    def _chunk_exists(self, chunk_hash: str) -> bool:
+        """Check whether a chunk was already uploaded"""
+
+        try:
+            self.s3_client.head_object(Bucket=BUCKET_NAME, Key=self.chunk_key(chunk_hash))
+        except botocore.exceptions.ClientError as error:
+            if error.response["Error"]["Code"] not in ("404", "NoSuchKey"):
+                raise error
+
+            return False
+
+        return True
+
+    def _upload_chunk(  # pylint: disable=too-many-arguments
+        self, path: str, offset: int, size: int, chunk_hash: str, upload: Progress, level: Optional[int]
+    ) -> int:
+        """
+        Upload a single chunk of a file, compressed with zstd at the given level if that makes it smaller. Chunks are
+        stored under the hash of their uncompressed content either way, and compressed ones are marked by a codec in
+        their metadata.
+
+        :return: The number of bytes stored.
+        """
+
+        with open(path, "rb") as file:
+            file.seek(offset)
+            body = file.read(size)
+
+        kwargs = {}
+        if level is not None:
+            compressed = zstandard.ZstdCompressor(level=level).compress(body)
+            if len(compressed) < len(body):
+                body, kwargs = compressed, dict(Metadata=dict(codec="zstd"))
+
+        self.s3_client.put_object(Bucket=BUCKET_NAME, Key=self.chunk_key(chunk_hash), Body=body, **kwargs)
+        upload(size)
+
+        return len(body)
+
+    def upload(
+        self,
+        files: Dict[str, Tuple[str, Chunks]],
+        progress: Optional[Callable[[int, int], None]] = None,
+        level: Optional[int] = None,
+    ) -> None:
+        """
+        Upload the files that are not stored yet: their chunks that are not stored yet, followed by their manifest.
+        Manifests are uploaded last, so files that have one are skipped without checking their chunks.
+
+        :param files: SHA-256 and chunks of every file to upload, by path.
+        :param progress: Called with the bytes uploaded so far and the total, from the calling thread.
+        :param level: Level of the zstd compression of chunks, None to upload them uncompressed.
+        """
+
+        # Find which files are missing
+        with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as executor:
+            manifests = dict(files.values())
+            stored = dict(zip(manifests, executor.map(self._manifest_exists, manifests)))
+
+        files = {path: (file_hash, chunks) for path, (file_hash, chunks) in files.items() if not stored[file_hash]}
+        if not files:
+            return
+
+        # Find which of their chunks are missing
+        located = self._locate_chunks(files)
+        with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as executor:
+            exists = dict(zip(located, executor.map(self._chunk_exists, located)))
+
+        missing = [(*located[chunk_hash], chunk_hash) for chunk_hash, found in exists.items() if not found]
+
+        # Upload them concurrently
+        if missing:
+            total = sum(size for _, _, size, _ in missing)
+            typer.echo(f"Uploading {len(missing)} of {len(located)} chunks ({total / MB:.1f} MB)...")
+
+            upload = Progress(total, progress)
+            stored = upload.run(lambda: self._upload_chunks(missing, upload, level))
+            typer.echo(
+                f"Uploaded {upload.done / MB:.1f} MB ({stored / MB:.1f} MB stored) in {upload.seconds:.1f}s "
+                f"({upload.throughput:.1f} MB/s)"
+            )
+
+        # Upload manifests last, so they never list a missing chunk
+        manifests = dict(files.values())
+        with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as executor:
+            futures = [executor.submit(self._save_manifest, *manifest, level) for manifest in manifests.items()]
+            for future in futures:
+                future.result()
+
+    def _manifest_exists(self, file_hash: str) -> bool:
+        """Check whether the manifest of a file was already uploaded, and so all of its chunks were too"""
+
+        return self.store.load(self.manifest_key(file_hash)) is not None
+
+    @staticmethod
+    def _locate_chunks(files: Dict[str, Tuple[str, Chunks]]) -> Dict[str, Tuple[str, int, int]]:
+        """Locate every distinct chunk of some files, as its path, offset and size in the first file that has it"""
+
+        located: Dict[str, Tuple[str, int, int]] = {}
+        for path, (_, chunks) in files.items():
+            offset = 0
+            for chunk_hash, size in chunks:
+                located.setdefault(chunk_hash, (path, offset, size))
+                offset += size
+
+        return located
+
+    def _save_manifest(self, file_hash: str, chunks: Chunks, level: Optional[int]) -> None:
+        """
+        Save the manifest of a file. The manifest records how the uploaded chunks were compressed, while render hosts
+        decompress every chunk according to its metadata.
+        """
+
+        key = self.manifest_key(file_hash)
+        manifest = dict(
+            sha256=file_hash,
+            size=sum(size for _, size in chunks),
+            chunks=[list(chunk) for chunk in chunks],
+            compression=None if level is None else dict(codec="zstd", level=level),
+        )
+        self.store.save(key, manifest, manifest)
+
+    def _upload_chunks(self, missing: List[Tuple[str, int, int, str]], upload: Progress, level: Optional[int]) -> int:
+        """Upload (path, offset, size, SHA-256) chunks through a bounded thread pool, returning the bytes stored"""
+
+        with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as executor:
+            futures = [executor.submit(self._upload_chunk, *chunk, upload, level) for chunk in missing]
+            return sum(future.result() for future in futures)
+
+    @staticmethod
+    def chunk_package(
+        blend_path: str, source_path: str, dependencies: List[Dependency]
+    ) -> Tuple[Package, Dict[str, Tuple[str, Chunks]]]:
+        """
+        Split a blend file and the files it depends on into chunks.
+
+        :param blend_path: Path to the blend file to upload.
+        :param source_path: Path of the blend file it was saved from, which its relative paths are relative to.
+        :param dependencies: External files referenced by the blend file.
+        :return: The package listing the files, and the SHA-256 and chunks of every file by path.
+        """
+
+        # Split every file into chunks, hashing them concurrently
+        paths = [blend_path] + sorted({file for dependency in dependencies for file in dependency.files})
+        typer.echo(f"Splitting blend file and {len(paths) - 1} external files into chunks...")
+        with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as executor:
+            files = dict(zip(paths, executor.map(chunk_file, paths)))
+
+        # Lay out external files at their absolute path, remapping the ones the blend file stores absolute paths to
+        package = Package(
+            blend_path=mirror_path(source_path),
+            blend_hash=files[blend_path][0],
+            assets=[
+                Asset(path=mirror_path(path), sha256=file_hash, size=sum(size for _, size in chunks))
+                for path, (file_hash, chunks) in files.items()
+                if path != blend_path
+            ],
+            remap={
+                dependency.filepath: mirror_path(dependency.path)
+                for dependency in dependencies
+                if not dependency.linked and not dependency.filepath.startswith("//")
+            },
+        )
+
+        return package, files
+
+    def upload_package(
+        self,
+        package: Package,
+        files: Dict[str, Tuple[str, Chunks]],
+        progress: Optional[Callable[[int, int], None]] = None,
+        level: Optional[int] = None,
+    ) -> None:
+        """
+        Upload the files of a package that are not stored yet, followed by the package itself.
+
+        :param files: SHA-256 and chunks of every file of the package, by path.
+        :param progress: Called with the bytes uploaded so far and the total, from the calling thread.
+        :param level: Level of the zstd compression of chunks, None to upload them uncompressed.
+        """
+
+        self.upload(files, progress, level)
+
+        key = self.package_key(package.package_hash)
+        if self.store.load(key) is None:
+            self.store.save(key, package.dict())
+
+    @staticmethod
+    def compression_level(compress: bool) -> Optional[int]:
+        """Level of the zstd compression of chunks, None if they are uploaded uncompressed"""
+
+        if compress and zstandard is None:
+            typer.echo("zstandard is not installed, uploading uncompressed files.")
+            return None
+
+        return COMPRESSION_LEVEL if compress else None
+
+    def package_files(self, package_hashes: Iterable[str]) -> Set[str]:
+        """SHA-256 of every file of some packages"""
+
+        with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as executor:
+            packages = executor.map(
+                lambda package_hash: self.store.load(self.package_key(package_hash)), package_hashes
+            )
+            return {file_hash for package in packages if package is not None for file_hash in Package(**package).files}
+
+    def delete(self, file_hashes: Iterable[str], keep: Iterable[str], package_hash: Optional[str] = None) -> None:
+        """
+        Delete files, along with their chunks that no other file uses.
+
+        :param keep: Hashes of the files still in use.
+        :param package_hash: Package listing the files, deleted along with them.
+        """
+
+        keep = set(keep)
+        file_hashes = set(file_hashes) - keep
+
+        # Collect the chunks of the files to delete, and of the files still in use
+        with ThreadPoolExecutor(max_workers=CHUNK_WORKERS) as executor:
+            manifests = dict(zip(file_hashes, executor.map(self._load_manifest, file_hashes)))
+            used = {chunk_hash for other in executor.map(self._load_manifest, keep) for chunk_hash in other}
+
+        # Delete the package and manifests first, so that they never list a deleted file or chunk
+        if package_hash is not None:
+            self.store.delete(self.package_key(package_hash))
+
+        for file_hash in file_hashes:
+            self.store.delete(self.manifest_key(file_hash))
+            self.s3_client.delete_object(Bucket=BUCKET_NAME, Key=f"{BLOBS_DIR}/{file_hash}")
+
+        # Delete unused chunks, in batches of 1000 (limited by AWS)
+        unused = sorted({chunk_hash for chunks in manifests.values() for chunk_hash in chunks} - used)
+        for i in range(0, len(unused), 1000):
+            self.s3_client.delete_objects(
+                Bucket=BUCKET_NAME,
+                Delete=dict(Objects=[dict(Key=self.chunk_key(chunk_hash)) for chunk_hash in unused[i : i + 1000]]),
+            )
+
+    def _load_manifest(self, file_hash: str) -> Set[str]:
+        """SHA-256 of every chunk of a file, none if it has no manifest"""
+
+        manifest = self.store.load(self.manifest_key(file_hash))
+        if manifest is None:
+            return set()
+
+        return {chunk_hash for chunk_hash, _ in manifest["chunks"]}
@@ -0,0 +1,109 @@
+"""
+Content-defined chunking of blend files, so that only the chunks that changed between uploads are sent.
+
+Chunk boundaries are placed where a rolling hash of the preceding bytes matches a pattern, so they only depend on
+nearby content: inserting or removing bytes only changes the chunks around the edit. Hashing relies on numpy, which
+ships with Blender. Without it, files are split into fixed-size chunks, which only helps when edits don't shift the
+rest of the file.
+"""
+
+from typing import Iterator, List, Tuple
+from functools import lru_cache
+import hashlib
+import os
+
+from .config import CHUNK_MIN_SIZE, CHUNK_MAX_SIZE, CHUNK_MASK_BITS, CHUNK_WINDOW, CHUNK_READ_SIZE
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Random value of every byte, summed over the rolling window
+GEAR = [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:4], "little") for i in range(256)]
+
+
+def _candidates(path: str) -> Iterator[int]:
+    """Yield the offsets where the rolling hash allows a chunk boundary, in increasing order"""
+
+    # Fall back to fixed-size chunks, of the average size of content-defined ones
+    if numpy is None:
+        offset = 0
+        while True:
+            offset += CHUNK_MIN_SIZE + (1 << CHUNK_MASK_BITS)
+            yield offset
+
+    gear = numpy.array(GEAR, dtype=numpy.uint32)
+    mask = numpy.uint32((1 << CHUNK_MASK_BITS) - 1)
+
+    # Read blocks, each prefixed with the end of the previous one so windows can span blocks
+    with open(path, "rb") as file:
+        tail, start = b"", 0
+        for block in iter(lambda: file.read(CHUNK_READ_SIZE), b""):
+            data = numpy.frombuffer(tail + block, dtype=numpy.uint8)
+
+            # Sum the random values of every window of bytes, using the difference of cumulative sums
+            sums = numpy.zeros(len(data) + 1, dtype=numpy.uint32)
+            numpy.cumsum(gear[data], dtype=numpy.uint32, out=sums[1:])
+            windows = sums[CHUNK_WINDOW:] - sums[:-CHUNK_WINDOW]
+
+            # A window ending at index i of data allows a boundary after it
+            for index in numpy.flatnonzero((windows & mask) == 0):
+                yield start - len(tail) + CHUNK_WINDOW + int(index)
+
+            start += len(block)
+            tail = (tail + block)[-(CHUNK_WINDOW - 1) :]
+
+
+def chunk_boundaries(path: str, size: int) -> List[int]:
+    """Find the end offset of every chunk of a file, enforcing the minimum and maximum chunk sizes"""
+
+    boundaries, last = [], 0
+    for candidate in _candidates(path):
+        if candidate >= size:
+            break
+
+        # Split chunks that would be too large
+        while candidate - last > CHUNK_MAX_SIZE:
+            last += CHUNK_MAX_SIZE
+            boundaries.append(last)
+
+        if candidate - last >= CHUNK_MIN_SIZE:
+            last = candidate
+            boundaries.append(last)
+
+    while size - last > CHUNK_MAX_SIZE:
+        last += CHUNK_MAX_SIZE
+        boundaries.append(last)
+
+    if size > last:
+        boundaries.append(size)
+
+    return boundaries
+
+
+def chunk_file(path: str) -> Tuple[str, List[Tuple[str, int]]]:
+    """
+    Split a file into chunks. Results are remembered until the file is modified, so that assets shared by several
+    jobs are only hashed once per session.
+
+    :return: The SHA-256 of the whole file, and the SHA-256 and size of each of its chunks.
+    """
+
+    stat = os.stat(path)
+    return _chunk_file(path, stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=1024)
+def _chunk_file(path: str, size: int, _: int) -> Tuple[str, List[Tuple[str, int]]]:
+    """Split a file into chunks, given its size and modification time"""
+
+    digest, chunks, last = hashlib.sha256(), [], 0
+    with open(path, "rb") as file:
+        for boundary in chunk_boundaries(path, size):
+            data = file.read(boundary - last)
+            digest.update(data)
+            chunks.append((hashlib.sha256(data).hexdigest(), len(data)))
+            last = boundary
+
+    return digest.hexdigest(), chunks
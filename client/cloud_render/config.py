@@ -25,7 +25,35 @@ GPU_INSTANCE_TYPES = "g4dn,p2,p3"
 CPU_INSTANCE_TYPES = "m6i,m5"
 
 # Jobs State
-JOBS_STATE_FILE = "jobs.state"
+JOBS_STATE_FILE = "jobs.state"  # Legacy state of every job, migrated to per-job state objects
+JOBS_INDEX_FILE = "jobs.index"
+JOB_STATE_FILE = "state.bin"
+LEGACY_JOB_STATE_FILE = "state.json"
+JOB_STATUS_DIR = "status"  # Completion markers written by the render container, one per batch job
+JOB_METRICS_DIR = "metrics"  # Phase timings written by the render container, one per batch job or part of a frame
+JOB_PROGRESS_DIR = "progress"  # Latest heartbeat of every running batch job or part of a frame
+JOB_PARTS_DIRS = ("tiles", "samples")  # Parts of split frames, rendered before being stitched or merged
+STATE_CACHE_DIR = "state_cache"
+
+# Blend files, stored by the SHA-256 of their content so that identical files are only uploaded once. Blend files
+# are split into content-defined chunks, listed by a manifest, so that unchanged chunks are only uploaded once too.
+# Packages list the blend file of a job along with the external files it depends on, which are stored the same way.
+BLOBS_DIR = "blobs"
+CHUNKS_DIR = "chunks"
+MANIFESTS_DIR = "manifests"
+PACKAGES_DIR = "packages"
+
+# Content-defined chunking (chunks average CHUNK_MIN_SIZE + 2^CHUNK_MASK_BITS bytes)
+CHUNK_MIN_SIZE = 512 * 1024
+CHUNK_MAX_SIZE = 4 * 1024 * 1024
+CHUNK_MASK_BITS = 19
+CHUNK_WINDOW = 64
+CHUNK_READ_SIZE = 16 * 1024 * 1024
+CHUNK_WORKERS = 16
+
+# Level of the zstd compression of uploaded chunks. Chunks that don't shrink, such as those of PNG or EXR textures,
+# are stored uncompressed.
+COMPRESSION_LEVEL = 3
 
 # Bucket name
 BUCKET_NAME = f"cloud-render-{DEPLOYMENT}"
@@ -38,10 +66,34 @@ JOB_DEF_GPU = f"{DEPLOYMENT}CloudRenderGpuRender"
 JOB_QUEUE_CPU = f"{DEPLOYMENT}CloudRenderCpuJobQueue"
 JOB_QUEUE_GPU = f"{DEPLOYMENT}CloudRenderGpuJobQueue"
 
+# Array jobs (AWS Batch limits an array job to between 2 and 10,000 children)
+ARRAY_JOB_MIN_SIZE = 2
+ARRAY_JOB_MAX_SIZE = 10000
+
+# Batch job submission
+SUBMIT_WORKERS = 8
+SUBMIT_MAX_ATTEMPTS = 8
+
+# Batch job status refresh (AWS describes at most 100 jobs per call)
+DESCRIBE_WORKERS = 8
+DESCRIBE_PAGE_SIZE = 100
+
+# Output file syncing (S3 clients upload files larger than 8MB in 8MB parts by default)
+SYNC_WORKERS = 8
+SYNC_BUFFER_SIZE = 1024 * 1024
+ETAG_PART_SIZE = 8 * 1024 * 1024
+OUTPUT_PART_SIZE = 64 * 1024 * 1024  # Part size of the outputs render containers upload, TRANSFER_PART_MB on the server
+FOLLOW_INTERVAL = 15  # Seconds between polls when following a running job
+PROFILE_ROWS = 25  # Functions listed by the CLI's --profile option, by cumulative time
+
+# Blend file transfers
+TRANSFER_PROGRESS_INTERVAL = 0.25  # Seconds between progress reports
+
 # Job status
 STATUS_RUNNING = "RUNNING"
 STATUS_ERROR = "ERROR"
 STATUS_SUCCEEDED = "SUCCEEDED"
+STATUS_INCOMPLETE = "INCOMPLETE"
 
 # AWS Creds
 CREDS_FILE_NAME = "creds.json"
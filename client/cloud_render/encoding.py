@@ -0,0 +1,91 @@
+"""
+Compact binary encoding of columnar state, used for per-frame job state.
+"""
+
+from typing import Any, Dict, Iterable, Optional, Tuple
+from array import array
+from datetime import datetime
+import json
+import struct
+import sys
+import zlib
+
+from .utils import DateTimeEncoder
+
+# Leading bytes of every packed blob, used to tell it apart from JSON
+MAGIC = b"CRC1"
+
+
+def column(typecode: str, values: Iterable) -> array:
+    """Create a column of values, stored as an array of the given typecode"""
+
+    return array(typecode, values)
+
+
+def to_epoch(value: Optional[datetime]) -> int:
+    """Convert a timestamp to seconds since the epoch, 0 meaning not set"""
+
+    if value is None:
+        return 0
+
+    return int(value.timestamp())
+
+
+def from_epoch(value: int) -> Optional[datetime]:
+    """Convert seconds since the epoch back into a timestamp"""
+
+    if value == 0:
+        return None
+
+    return datetime.fromtimestamp(value)
+
+
+def is_packed(body: bytes) -> bool:
+    """Check whether a blob was created by pack"""
+
+    return body[: len(MAGIC)] == MAGIC
+
+
+def pack(header: Dict[str, Any], columns: Dict[str, array]) -> bytes:
+    """
+    Pack a JSON header and named columns into a compressed binary blob.
+
+    Before compression, the blob holds the header's length as a uint32, the header itself and the raw little-endian
+    bytes of every column, in the order they are listed in the header.
+    """
+
+    descriptors = [[name, values.typecode, len(values)] for name, values in columns.items()]
+    header_bytes = bytes(json.dumps(dict(header=header, columns=descriptors), cls=DateTimeEncoder), "utf-8")
+
+    payload = [struct.pack("<I", len(header_bytes)), header_bytes]
+    for values in columns.values():
+        if sys.byteorder == "big":
+            values = array(values.typecode, values)
+            values.byteswap()
+
+        payload.append(values.tobytes())
+
+    return MAGIC + zlib.compress(b"".join(payload))
+
+
+def unpack(body: bytes) -> Tuple[Dict[str, Any], Dict[str, array]]:
+    """Unpack a blob created by pack into its header and columns"""
+
+    payload = zlib.decompress(body[len(MAGIC) :])
+
+    (header_len,) = struct.unpack_from("<I", payload)
+    offset = struct.calcsize("<I") + header_len
+    meta = json.loads(payload[struct.calcsize("<I") : offset].decode("utf-8"))
+
+    columns = {}
+    for name, typecode, length in meta["columns"]:
+        values = array(typecode)
+        size = values.itemsize * length
+        values.frombytes(payload[offset : offset + size])
+        if sys.byteorder == "big":
+            values.byteswap()
+
+        columns[name] = values
+        offset += size
+
+    return meta["header"], columns
@@ -0,0 +1,370 @@
+"""
+Data models of render jobs and their batch jobs.
+"""
+
+from typing import Any, Dict, Optional, List, Tuple
+from datetime import datetime
+import time
+import uuid
+
+from pydantic import BaseModel, PrivateAttr
+
+from .config import ARRAY_JOB_MAX_SIZE
+from .encoding import column, from_epoch, is_packed, pack, to_epoch, unpack
+from .state import parse_json
+
+
+class TrackedModel(BaseModel):
+    """Pydantic model that remembers whether any of its fields changed value since it was loaded or saved"""
+
+    _dirty: bool = PrivateAttr(default=False)
+
+    def __setattr__(self, name, value):
+        if name in self.__fields__ and getattr(self, name) != value:
+            super().__setattr__("_dirty", True)
+
+        super().__setattr__(name, value)
+
+    @property
+    def dirty(self) -> bool:
+        """Whether any field changed value"""
+
+        return self._dirty
+
+    def mark_clean(self) -> None:
+        """Forget about previous changes, e.g. once the model was saved"""
+
+        self._dirty = False
+
+
+class BatchJob(TrackedModel):
+    """
+    Data model of an individual AWS job.
+    A Job will have 1 BatchJob for every chunk of frames in the animation, rendered in a single Blender invocation.
+
+    Frames submitted as part of an array job are children of that array job. Their batch_id is derived from the
+    parent's ID and their array_index, rather than being returned by a submit_job call.
+    """
+
+    batch_id: str
+    name: str
+    status: Optional[str]
+    started_at: Optional[datetime]
+    stopped_at: Optional[datetime]
+    frame: int
+    frame_count: int = 1
+    array_index: Optional[int] = None
+
+    @property
+    def end_frame(self) -> int:
+        """Last frame rendered by this batch job"""
+
+        return self.frame + self.frame_count - 1
+
+
+def batch_job_name(job_id: str, first_frame: int, last_frame: int) -> str:
+    """Name of the batch job, or array job, rendering a range of frames"""
+
+    if first_frame == last_frame:
+        return f"render-job-{job_id}-frame-{first_frame}"
+
+    return f"render-job-{job_id}-frames-{first_frame}-{last_frame}"
+
+
+def tiles_job_name(job_id: str, frame: int) -> str:
+    """Name of the array job rendering the tiles of a frame"""
+
+    return f"render-job-{job_id}-tiles-{frame}"
+
+
+def samples_job_name(job_id: str, frame: int) -> str:
+    """Name of the array job rendering the partial renders of a frame"""
+
+    return f"render-job-{job_id}-samples-{frame}"
+
+
+class FrameProgress(BaseModel):
+    """Data model of the progress of a running batch job, from the latest heartbeat its render container published"""
+
+    percent: float
+    remaining_seconds: Optional[float] = None  # As estimated by Blender, for the frame being rendered
+    peak_memory_mb: Optional[float] = None
+    updated_at: float  # Seconds since the epoch
+
+    def describe(self) -> str:
+        """Describe the progress in a few words, such as: 42% (3:05 left, 12s ago)"""
+
+        details = []
+        if self.remaining_seconds is not None:
+            details.append(f"{int(self.remaining_seconds // 60)}:{int(self.remaining_seconds % 60):02d} left")
+        details.append(f"{max(int(time.time() - self.updated_at), 0)}s ago")
+
+        return f"{self.percent:.0f}% ({', '.join(details)})"
+
+
+class PhaseTimings(BaseModel):
+    """Data model of the timings of a phase of a job's batch jobs, such as pulling input files or running Blender"""
+
+    seconds: List[float] = []
+    counts: Dict[str, int] = {}  # Totals of what the phase measured besides time, such as bytes transferred
+
+    @property
+    def total(self) -> float:
+        """Seconds spent in the phase by every batch job"""
+
+        return sum(self.seconds)
+
+    @property
+    def mean(self) -> float:
+        """Seconds spent in the phase by the average batch job"""
+
+        return self.total / max(len(self.seconds), 1)
+
+    @property
+    def slowest(self) -> float:
+        """Seconds spent in the phase by the slowest batch job"""
+
+        return max(self.seconds, default=0.0)
+
+
+def aggregate_timings(records: List[Dict[str, Any]]) -> Dict[str, PhaseTimings]:
+    """
+    Aggregate the phase timings the render container recorded for every batch job of a job, in the order phases
+    run. Parts of a phase timed by the container, like loading the blend file within Blender's run, are named after
+    both, while the whole run of every batch job is named total.
+    """
+
+    timings: Dict[str, PhaseTimings] = {}
+    for record in records:
+        for phase, values in record["phases"].items():
+            for key, value in values.items():
+                if key == "seconds":
+                    timings.setdefault(phase, PhaseTimings()).seconds.append(value)
+                elif key.endswith("_seconds"):
+                    timings.setdefault(f"{phase}.{key[: -len('_seconds')]}", PhaseTimings()).seconds.append(value)
+                else:
+                    counts = timings.setdefault(phase, PhaseTimings()).counts
+                    counts[key] = counts.get(key, 0) + value
+
+        if record.get("stopped_at") is not None:
+            timings.setdefault("total", PhaseTimings()).seconds.append(record["stopped_at"] - record["started_at"])
+
+    # Keep the total last, even though the first record created it
+    if "total" in timings:
+        timings["total"] = timings.pop("total")
+
+    return timings
+
+
+class JobSummary(BaseModel):
+    """Data model of a render job's summary, as stored in the jobs index"""
+
+    job_id: str
+    creation_date: datetime
+    completion_date: Optional[datetime]
+    start_frame: int
+    end_frame: int
+    gpu: bool
+    file_name: str
+    status: Optional[str]
+    blend_hash: Optional[str] = None
+    package_hash: Optional[str] = None
+
+
+class Job(TrackedModel, JobSummary):
+    """Data model of a render job"""
+
+    children: Dict[int, BatchJob]
+    array_jobs: List[str] = []
+    chunk_size: int = 1
+    array: bool = False
+    tiles_x: int = 1  # Single frames can be split into tiles, rendered by separate batch jobs then stitched
+    tiles_y: int = 1
+    sample_splits: int = 1  # Or their samples split across partial renders, rendered separately then merged
+
+    @property
+    def tile_count(self) -> int:
+        """Number of tiles the frame is split into, 1 if the job is not tiled"""
+
+        return self.tiles_x * self.tiles_y
+
+    @property
+    def split_count(self) -> int:
+        """Number of batch jobs rendering parts of the frame, tiles or partial renders, 1 if it is not split"""
+
+        return self.tile_count * self.sample_splits
+
+    @property
+    def chunk_count(self) -> int:
+        """Number of batch jobs needed to render every frame"""
+
+        return (self.end_frame - self.start_frame) // self.chunk_size + 1
+
+    def array_groups(self) -> List[Tuple[int, int]]:
+        """
+        Group the job's chunks into array jobs of up to ARRAY_JOB_MAX_SIZE chunks, as the index of their first chunk
+        and their number of chunks. AWS Batch rejects array jobs of a single child, so a lone last chunk is grouped
+        with the last chunk of the group before it.
+        """
+
+        groups = [
+            (first, min(ARRAY_JOB_MAX_SIZE, self.chunk_count - first))
+            for first in range(0, self.chunk_count, ARRAY_JOB_MAX_SIZE)
+        ]
+        if len(groups) > 1 and groups[-1][1] == 1:
+            groups[-2:] = [(groups[-2][0], ARRAY_JOB_MAX_SIZE - 1), (groups[-1][0] - 1, 2)]
+
+        return groups
+
+    @property
+    def dirty(self) -> bool:
+        """Whether any field of the job or of its batch jobs changed value"""
+
+        return self._dirty or any(batch_job.dirty for batch_job in self.children.values())
+
+    def mark_clean(self) -> None:
+        """Forget about previous changes of the job and its batch jobs"""
+
+        super().mark_clean()
+        for batch_job in self.children.values():
+            batch_job.mark_clean()
+
+    def summary(self) -> JobSummary:
+        """Summarize the job for the jobs index"""
+
+        return JobSummary(**{field: getattr(self, field) for field in JobSummary.__fields__})
+
+    def batch_parameters(self, first_frame: int, last_frame: int) -> Dict[str, str]:
+        """Parameters of the batch job, or array job, rendering a range of frames"""
+
+        return dict(
+            frame=str(first_frame),
+            end=str(last_frame),
+            chunk=str(self.chunk_size),
+            job=self.job_id,
+            blend=self.blend_hash or "",
+            package=self.package_hash or "",
+            tilesx=str(self.tiles_x),
+            tilesy=str(self.tiles_y),
+            splits=str(self.sample_splits),
+            stage="render",
+        )
+
+    def derive_batch_job(self, frame: int) -> Tuple[int, str, Optional[str], Optional[int]]:
+        """
+        Derive what the state of the batch job rendering the chunk starting at a frame would be, if it was
+        submitted by create_job.
+
+        :return: The chunk's frame count, the batch job's name, its ID if it is the child of an array job, and its
+        array index.
+        """
+
+        chunk_index = (frame - self.start_frame) // self.chunk_size
+        frame_count = min(self.chunk_size, self.end_frame - frame + 1)
+        if not self.array:
+            return frame_count, batch_job_name(self.job_id, frame, frame + frame_count - 1), None, None
+
+        # Find the array job of the chunk
+        groups = self.array_groups()
+        array_num = next(num for num, (first, count) in enumerate(groups) if chunk_index < first + count)
+        first, count = groups[array_num]
+        array_index = chunk_index - first
+        array_start = self.start_frame + first * self.chunk_size
+        array_end = min(array_start + count * self.chunk_size - 1, self.end_frame)
+        name = batch_job_name(self.job_id, array_start, array_end)
+
+        batch_id = None
+        if array_num < len(self.array_jobs):
+            batch_id = f"{self.array_jobs[array_num]}:{array_index}"
+
+        return frame_count, name, batch_id, array_index
+
+    def to_bytes(self) -> bytes:
+        """
+        Encode the job in a compact columnar format. Batch jobs are stored as arrays of small-int status codes and
+        epoch timestamps, while their frames, names and IDs are left out whenever they can be derived from the job.
+        """
+
+        children = list(self.children.values())
+        derived = [self.derive_batch_job(batch_job.frame) for batch_job in children]
+        header = self.dict(exclude={"children"})
+        columns = {}
+
+        # Frame ranges
+        frames = [batch_job.frame for batch_job in children]
+        if frames != list(range(self.start_frame, self.end_frame + 1, self.chunk_size)):
+            columns["frame"] = column("q", frames)
+
+        frame_counts = [batch_job.frame_count for batch_job in children]
+        if frame_counts != [frame_count for frame_count, _, _, _ in derived]:
+            columns["frame_count"] = column("i", frame_counts)
+
+        # Names, IDs and array indexes
+        names = [batch_job.name for batch_job in children]
+        if names != [name for _, name, _, _ in derived]:
+            header["names"] = names
+
+        batch_ids = [batch_job.batch_id for batch_job in children]
+        if batch_ids != [batch_id for _, _, batch_id, _ in derived]:
+            try:
+                uuids = [uuid.UUID(batch_id) for batch_id in batch_ids]
+                if [str(val) for val in uuids] != batch_ids:
+                    raise ValueError("Batch IDs are not canonical UUIDs")
+                columns["batch_id"] = column("B", b"".join(val.bytes for val in uuids))
+            except ValueError:
+                header["batch_ids"] = batch_ids
+
+        array_indexes = [batch_job.array_index for batch_job in children]
+        if array_indexes != [array_index for _, _, _, array_index in derived]:
+            header["array_indexes"] = array_indexes
+
+        # Statuses, as indexes into a table of every status in use, with 0 meaning no status
+        header["statuses"] = sorted({batch_job.status for batch_job in children if batch_job.status is not None})
+        codes = {status: code for code, status in enumerate(header["statuses"], start=1)}
+        columns["status"] = column("B", [codes.get(batch_job.status, 0) for batch_job in children])
+
+        # Timestamps, as seconds since the epoch, with 0 meaning not set
+        columns["started_at"] = column("q", [to_epoch(batch_job.started_at) for batch_job in children])
+        columns["stopped_at"] = column("q", [to_epoch(batch_job.stopped_at) for batch_job in children])
+
+        return pack(header, columns)
+
+    @classmethod
+    def from_bytes(cls, body: bytes) -> "Job":
+        """Decode a job encoded by to_bytes. Jobs stored in the older JSON format are decoded too."""
+
+        if not is_packed(body):
+            return cls.parse_obj(parse_json(body))
+
+        header, columns = unpack(body)
+        stored = {field: header.pop(field, None) for field in ("names", "batch_ids", "array_indexes")}
+        statuses = [None] + header.pop("statuses")
+        job = cls.parse_obj(dict(header, children={}))
+
+        # Rebuild batch jobs, deriving whatever was left out. Decoded values already have the right types, so
+        # validation is skipped
+        frames = columns.get("frame", range(job.start_frame, job.end_frame + 1, job.chunk_size))
+        children = {}
+        for i, frame in enumerate(frames):
+            frame_count, name, batch_id, array_index = job.derive_batch_job(frame)
+
+            if "batch_id" in columns:
+                batch_id = str(uuid.UUID(bytes=columns["batch_id"][i * 16 : (i + 1) * 16].tobytes()))
+            elif stored["batch_ids"] is not None:
+                batch_id = stored["batch_ids"][i]
+
+            children[frame] = BatchJob.construct(
+                batch_id=batch_id,
+                name=name if stored["names"] is None else stored["names"][i],
+                status=statuses[columns["status"][i]],
+                started_at=from_epoch(columns["started_at"][i]),
+                stopped_at=from_epoch(columns["stopped_at"][i]),
+                frame=frame,
+                frame_count=columns["frame_count"][i] if "frame_count" in columns else frame_count,
+                array_index=array_index if stored["array_indexes"] is None else stored["array_indexes"][i],
+            )
+
+        job.children = children
+        job.mark_clean()
+
+        return job
@@ -0,0 +1,145 @@
+"""
+Instrumentation of the AWS clients through botocore's events, recording how many calls every operation made, how long
+they took, how often they were retried or throttled, and how many bytes they transferred.
+"""
+
+from typing import Any, Dict, List, Optional
+from threading import Lock
+import math
+import time
+
+from pydantic import BaseModel
+
+# Error codes AWS services return when throttling requests
+THROTTLING_ERRORS = {
+    "Throttling",
+    "ThrottlingException",
+    "ThrottledException",
+    "RequestThrottled",
+    "RequestThrottledException",
+    "TooManyRequestsException",
+    "RequestLimitExceeded",
+    "SlowDown",
+}
+
+# Key of the time a call started at, stored in the context botocore passes along with every call
+STARTED_AT = "cloud_render_started_at"
+
+
+class OperationStats(BaseModel):
+    """Data model of the calls made to an AWS operation"""
+
+    latencies: List[float] = []  # Seconds every call took, including its retries
+    attempts: int = 0
+    throttles: int = 0
+    errors: int = 0
+    bytes_sent: int = 0
+    bytes_received: int = 0
+
+    @property
+    def calls(self) -> int:
+        """Number of calls made to the operation"""
+
+        return len(self.latencies)
+
+    @property
+    def retries(self) -> int:
+        """Number of requests botocore retried"""
+
+        return max(self.attempts - self.calls, 0)
+
+    def percentile(self, percent: float) -> float:
+        """Latency of calls at a percentile, in seconds"""
+
+        if not self.latencies:
+            return 0.0
+
+        latencies = sorted(self.latencies)
+        return latencies[max(math.ceil(percent / 100 * len(latencies)) - 1, 0)]
+
+
+def content_length(headers: Optional[Any]) -> int:
+    """
+    Size of the body of a request or response, from its headers. Uploads sent in chunks along with their checksum
+    declare the size of their data in a header of their own.
+    """
+
+    if headers is None:
+        return 0
+
+    return int(headers.get("Content-Length") or headers.get("X-Amz-Decoded-Content-Length") or 0)
+
+
+class ApiStats:
+    """
+    Statistics of the calls made by every instrumented client, by service and operation.
+    Clients are shared by threads, so the statistics are updated under a lock.
+    """
+
+    def __init__(self):
+        self.operations: Dict[str, OperationStats] = {}
+        self.lock = Lock()
+
+    def instrument(self, client: Any) -> Any:
+        """Record the calls made by a client, returning it"""
+
+        events = client.meta.events
+        events.register("before-call.*.*", self.call_started)
+        events.register("after-call.*.*", self.call_done)
+        events.register("after-call-error.*.*", self.call_done)
+        events.register("before-send.*.*", self.request_sent)
+        events.register("response-received.*.*", self.response_received)
+
+        return client
+
+    def operation(self, event_name: str) -> OperationStats:
+        """Statistics of the operation an event was emitted for, named like s3.PutObject"""
+
+        name = event_name.split(".", 1)[1]
+        if name not in self.operations:
+            self.operations[name] = OperationStats()
+
+        return self.operations[name]
+
+    def call_started(self, context: Dict[str, Any], **_) -> None:
+        """Record when a call started, before its first request is sent"""
+
+        context[STARTED_AT] = time.perf_counter()
+
+    def call_done(self, event_name: str, context: Dict[str, Any], **kwargs) -> None:
+        """Record the latency of a call once it's done, whether it succeeded or not"""
+
+        started_at = context.pop(STARTED_AT, None)
+        if started_at is None:
+            return
+
+        latency = time.perf_counter() - started_at
+        failed = "exception" in kwargs or kwargs["http_response"].status_code >= 300
+        with self.lock:
+            stats = self.operation(event_name)
+            stats.latencies.append(latency)
+            stats.errors += failed
+
+    def request_sent(self, event_name: str, request: Any, **_) -> None:
+        """Record a request about to be sent, which is retried if it fails"""
+
+        with self.lock:
+            stats = self.operation(event_name)
+            stats.attempts += 1
+            stats.bytes_sent += content_length(request.headers)
+
+    def response_received(
+        self, event_name: str, response_dict: Optional[Dict[str, Any]], parsed_response: Optional[Dict[str, Any]], **_
+    ) -> None:
+        """Record the response to a request. Streamed bodies are counted in full, whether they are read or not."""
+
+        error_code = (parsed_response or {}).get("Error", {}).get("Code")
+        with self.lock:
+            stats = self.operation(event_name)
+            stats.throttles += error_code in THROTTLING_ERRORS
+            if response_dict is not None:
+                stats.bytes_received += content_length(response_dict["headers"])
+
+
+# Statistics of every client of the add-on and the CLI
+api_stats = ApiStats()
@@ -0,0 +1,160 @@
+"""
+Logic pertaining to reading and writing state objects in S3.
+"""
+
+from typing import Any, Callable, Dict, Optional, Tuple
+from pathlib import Path
+import json
+import os
+
+from mypy_boto3_s3 import S3Client
+import botocore
+
+from .config import BUCKET_NAME, STATE_CACHE_DIR
+from .utils import DateTimeEncoder
+
+# Script path is where the state cache will be saved
+script_path = os.path.dirname(os.path.realpath(__file__))
+cache_path = Path(script_path) / Path(STATE_CACHE_DIR)
+
+
+def parse_json(body: bytes) -> Any:
+    """Decode a JSON state object"""
+
+    return json.loads(body.decode("utf-8"))
+
+
+class StateStore:
+    """
+    The StateStore reads and writes state objects in the bucket. Objects are JSON, unless saved as raw bytes.
+
+    Objects are cached by ETag, both on disk and in memory, so that loading an unchanged object only costs a
+    conditional request answered with 304 Not Modified. The in-memory cache keeps the parsed object, so callers that
+    modify a loaded object must save it afterwards.
+    """
+
+    s3_client: S3Client
+    parsed: Dict[str, Tuple[str, Any]]
+
+    def __init__(self, s3_client: S3Client):
+        self.s3_client = s3_client
+        self.parsed = {}
+
+    @staticmethod
+    def _cache_file(key: str) -> Path:
+        """Path of an object's body in the on-disk cache. Its ETag is saved next to it."""
+
+        return cache_path / Path(key.replace("/", "__"))
+
+    def _read_cache(self, key: str) -> Tuple[Optional[str], Optional[bytes]]:
+        """Read an object's ETag and body from the on-disk cache"""
+
+        cache_file = self._cache_file(key)
+        etag_file = cache_file.with_suffix(cache_file.suffix + ".etag")
+        if not cache_file.exists() or not etag_file.exists():
+            return None, None
+
+        return etag_file.read_text(encoding="utf-8"), cache_file.read_bytes()
+
+    def _write_cache(self, key: str, etag: str, body: bytes) -> None:
+        """Write an object's ETag and body to the on-disk cache, replacing both files atomically"""
+
+        cache_file = self._cache_file(key)
+        etag_file = cache_file.with_suffix(cache_file.suffix + ".etag")
+        os.makedirs(str(cache_path), exist_ok=True)
+
+        # Remove the ETag first, so a partially written cache entry is never considered valid
+        if etag_file.exists():
+            etag_file.unlink()
+
+        tmp_file = cache_file.with_suffix(cache_file.suffix + ".tmp")
+        tmp_file.write_bytes(body)
+        os.replace(str(tmp_file), str(cache_file))
+
+        tmp_file.write_text(etag, encoding="utf-8")
+        os.replace(str(tmp_file), str(etag_file))
+
+    def _forget(self, key: str) -> None:
+        """Drop an object from both caches"""
+
+        self.parsed.pop(key, None)
+
+        cache_file = self._cache_file(key)
+        for path in (cache_file, cache_file.with_suffix(cache_file.suffix + ".etag")):
+            if path.exists():
+                path.unlink()
+
+    def load(self, key: str, parse: Callable[[bytes], Any] = parse_json) -> Optional[Any]:
+        """
+        Load a state object from S3, return None if not found.
+
+        :param parse: Converts the object's body into the returned value. Parsed values are reused for as long as the
+        object's ETag is unchanged.
+        """
+
+        # Look up the cached ETag, in memory first
+        etag, body = None, None
+        if key in self.parsed:
+            etag = self.parsed[key][0]
+        else:
+            etag, body = self._read_cache(key)
+
+        # Only fetch the body if it changed since it was cached
+        try:
+            if etag is not None:
+                obj = self.s3_client.get_object(Bucket=BUCKET_NAME, Key=key, IfNoneMatch=etag)
+            else:
+                obj = self.s3_client.get_object(Bucket=BUCKET_NAME, Key=key)
+        except botocore.exceptions.ClientError as error:
+            code = error.response["Error"]["Code"]
+            if code in ("304", "NotModified"):
+                if key in self.parsed:
+                    return self.parsed[key][1]
+
+                value = parse(body)
+                self.parsed[key] = (etag, value)
+
+                return value
+
+            if code != "NoSuchKey":
+                raise error
+
+            self._forget(key)
+
+            return None
+
+        body = obj["Body"].read()
+        self._write_cache(key, obj["ETag"], body)
+
+        value = parse(body)
+        self.parsed[key] = (obj["ETag"], value)
+
+        return value
+
+    def save(self, key: str, value: Any, parsed: Any = None) -> None:
+        """
+        Persist a state object to S3.
+
+        :param value: Raw bytes, or a value to serialize as JSON.
+        :param parsed: The parsed form of value, reused by later loads of the object.
+        """
+
+        serialized = value
+        if not isinstance(value, bytes):
+            serialized = bytes(json.dumps(value, cls=DateTimeEncoder), "utf-8")
+
+        response = self.s3_client.put_object(Bucket=BUCKET_NAME, Key=key, Body=serialized)
+
+        # Cache what was just written, so the next load is a 304
+        self._write_cache(key, response["ETag"], serialized)
+        if parsed is not None:
+            self.parsed[key] = (response["ETag"], parsed)
+        else:
+            self.parsed.pop(key, None)
+
+    def delete(self, key: str) -> None:
+        """Remove a state object from S3"""
+
+        self.s3_client.delete_object(Bucket=BUCKET_NAME, Key=key)
+
+        self._forget(key)
@@ -0,0 +1,206 @@
+"""
+Logic pertaining to transferring files between S3 and local disk.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from threading import Lock
+from pathlib import Path
+import hashlib
+import math
+import time
+import os
+import shutil
+
+import botocore
+from mypy_boto3_s3 import S3Client
+from pydantic import BaseModel
+
+from .config import (
+    BUCKET_NAME,
+    SYNC_BUFFER_SIZE,
+    SYNC_WORKERS,
+    ETAG_PART_SIZE,
+    OUTPUT_PART_SIZE,
+    TRANSFER_PROGRESS_INTERVAL,
+)
+
+# Size of a megabyte, used when reporting throughput
+MB = 1024 * 1024
+
+
+class SyncResult(BaseModel):
+    """Data model of the outcome of syncing files to local disk"""
+
+    downloaded: int = 0
+    skipped: int = 0
+    bytes: int = 0
+    seconds: float = 0.0
+    following: bool = False  # Whether the job is still running, so more files may follow
+
+    @property
+    def throughput(self) -> float:
+        """Download throughput in MB/s"""
+
+        return self.bytes / MB / max(self.seconds, 1e-6)
+
+
+class Progress:
+    """
+    Byte counter passed as the Callback of S3 transfers, which call it from their worker threads.
+    Progress is reported to a callback on the thread that started the transfer, so it can safely update UIs.
+    """
+
+    def __init__(self, total: int, report: Optional[Callable[[int, int], None]] = None):
+        self.total = total
+        self.report = report
+        self.done = 0
+        self.seconds = 0.0
+        self.lock = Lock()
+
+    def __call__(self, bytes_amount: int) -> None:
+        with self.lock:
+            self.done += bytes_amount
+
+    @property
+    def throughput(self) -> float:
+        """Transfer throughput in MB/s"""
+
+        return self.done / MB / max(self.seconds, 1e-6)
+
+    def run(self, transfer: Callable[[], Any]) -> Any:
+        """Run a transfer in the background, reporting its progress periodically until it returns its result"""
+
+        start_time = time.monotonic()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            future = executor.submit(transfer)
+            while not wait([future], timeout=TRANSFER_PROGRESS_INTERVAL).done:
+                if self.report is not None:
+                    self.report(self.done, self.total)
+
+        self.seconds = time.monotonic() - start_time
+        if self.report is not None:
+            self.report(self.done, self.total)
+
+        return future.result()
+
+
+def file_etag(path: Path, part_size: Optional[int] = None) -> str:
+    """
+    Compute the ETag S3 would give a file, if it was uploaded without encryption by KMS.
+    Files uploaded in parts have the MD5 of their parts' MD5s as ETag, followed by the number of parts.
+    """
+
+    # Files uploaded in a single part have their MD5 as ETag
+    if part_size is None:
+        digest = hashlib.md5()
+        with open(str(path), "rb") as file:
+            for block in iter(lambda: file.read(SYNC_BUFFER_SIZE), b""):
+                digest.update(block)
+
+        return f'"{digest.hexdigest()}"'
+
+    # Hash every part separately
+    digests = []
+    with open(str(path), "rb") as file:
+        for part in iter(lambda: file.read(part_size), b""):
+            digests.append(hashlib.md5(part).digest())
+
+    return f'"{hashlib.md5(b"".join(digests)).hexdigest()}-{len(digests)}"'
+
+
+def is_unchanged(path: Path, size: int, etag: str) -> bool:
+    """Check whether a local file has the same content as an object, given its size and ETag"""
+
+    if not path.is_file() or path.stat().st_size != size:
+        return False
+
+    # Single part uploads
+    if "-" not in etag:
+        return file_etag(path) == etag
+
+    # Multipart uploads don't record their part size, so try the default one, the one render containers upload
+    # outputs in, and the smallest one that could have produced the same number of parts
+    part_count = int(etag.strip('"').split("-")[1])
+    part_sizes = {ETAG_PART_SIZE, OUTPUT_PART_SIZE, math.ceil(size / part_count / MB) * MB}
+
+    for part_size in part_sizes:
+        if math.ceil(size / part_size) == part_count and file_etag(path, part_size) == etag:
+            return True
+
+    return False
+
+
+def download_object(s3_client: S3Client, key: str, size: int, etag: str, output_file: Path) -> int:
+    """
+    Download an object to a local file, returning the number of bytes transferred.
+
+    The object is written to a temporary file named after its ETag, which is renamed once complete. If a previous
+    download of the same version was interrupted, it is resumed from where it stopped.
+    """
+
+    # Create directory if it does not exist
+    os.makedirs(str(output_file.parent), exist_ok=True)
+
+    # Remove partial downloads of other versions of the object
+    version = etag.strip('"')
+    part_file = output_file.with_name(f"{output_file.name}.{version}.part")
+    for stale_file in output_file.parent.glob(f"{output_file.name}.*.part"):
+        if stale_file != part_file:
+            stale_file.unlink()
+
+    # Resume from the end of the partial download, if any
+    offset = part_file.stat().st_size if part_file.exists() else 0
+    if offset > size:
+        part_file.unlink()
+        offset = 0
+
+    # Fetch the rest of the object, failing if it changed since it was listed
+    with open(str(part_file), "ab") as file:
+        if offset < size:
+            kwargs = dict(Bucket=BUCKET_NAME, Key=key, IfMatch=etag)
+            if offset > 0:
+                kwargs["Range"] = f"bytes={offset}-"
+
+            obj = s3_client.get_object(**kwargs)
+            shutil.copyfileobj(obj["Body"], file, SYNC_BUFFER_SIZE)
+
+    # Only replace the output file once the download is complete
+    if part_file.stat().st_size != size:
+        raise IOError(f"Incomplete download of {key}, expected {size} bytes")
+
+    os.replace(str(part_file), str(output_file))
+
+    return size - offset
+
+
+def list_new_objects(s3_client: S3Client, prefix: str, synced: Dict[str, str]) -> List[Tuple[str, int, str]]:
+    """List the (key, size, ETag) of objects under a prefix that were not synced yet, or changed since they were"""
+
+    objects = []
+    paginator = s3_client.get_paginator("list_objects_v2")
+    for page in paginator.paginate(Bucket=BUCKET_NAME, Prefix=prefix):
+        for obj in page.get("Contents", []):
+            if synced.get(obj["Key"]) != obj["ETag"]:
+                objects.append((obj["Key"], obj["Size"], obj["ETag"]))
+
+    return objects
+
+
+def describe_new_objects(s3_client: S3Client, keys: List[str], synced: Dict[str, str]) -> List[Tuple[str, int, str]]:
+    """Fetch the (key, size, ETag) of objects that were not synced yet, or changed since they were, if they exist"""
+
+    def describe(key: str) -> Optional[Tuple[str, int, str]]:
+        try:
+            obj = s3_client.head_object(Bucket=BUCKET_NAME, Key=key)
+        except botocore.exceptions.ClientError as error:
+            if error.response["Error"]["Code"] not in ("404", "NoSuchKey"):
+                raise error
+
+            return None
+
+        return key, obj["ContentLength"], obj["ETag"]
+
+    with ThreadPoolExecutor(max_workers=SYNC_WORKERS) as executor:
+        described = executor.map(describe, keys)
+        return [obj for obj in described if obj is not None and synced.get(obj[0]) != obj[2]]
@@ -2,8 +2,10 @@
 Miscellaneous utilities used by the rest of the codebase.
 """
 
+from threading import Lock
 import json
 import datetime
+import time
 
 
 class DateTimeEncoder(json.JSONEncoder):
@@ -15,3 +17,37 @@ class DateTimeEncoder(json.JSONEncoder):
             return str(o)
 
         return super().default(o)
+
+
+class AdaptiveBackoff:
+    """
+    Delay shared between threads calling a throttled API.
+    The delay doubles every time a call is throttled and halves after every successful call.
+    """
+
+    def __init__(self, base_delay: float = 0.1, max_delay: float = 10.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.delay = 0.0
+        self.lock = Lock()
+
+    def wait(self) -> None:
+        """Sleep for the current delay before making a call"""
+
+        with self.lock:
+            delay = self.delay
+
+        if delay > 0:
+            time.sleep(delay)
+
+    def throttled(self) -> None:
+        """Increase the delay after a throttled call"""
+
+        with self.lock:
+            self.delay = min(max(self.delay * 2, self.base_delay), self.max_delay)
+
+    def succeeded(self) -> None:
+        """Decrease the delay after a successful call"""
+
+        with self.lock:
+            self.delay = self.delay / 2 if self.delay > self.base_delay else 0.0
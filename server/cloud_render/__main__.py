@@ -2,80 +2,550 @@
 Entrypoint script for the server renderer image.
 """
 
+from typing import Any, Callable, Dict, List, Set, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from functools import partial
 import subprocess
+import hashlib
+import shutil
+import socket
+import json
+import time
+import uuid
 import os
 
 from pathlib import Path
+import botocore
 import typer
 import boto3
+import zstandard
+
+from .cache import BlendCache
+from .exr import merge_renders
+from .metrics import BlenderTimings, Metrics
+from .progress import Heartbeat
+from .transfer import TRANSFER_CONCURRENCY, TransferLog, transfer_config
 
 s3 = boto3.client("s3")
 
+# Number of output files uploaded concurrently
+UPLOAD_WORKERS = 8
+
+# Size of the blocks chunks are streamed in
+STREAM_BLOCK_SIZE = 256 * 1024
+
+# Number of input files pulled concurrently, each with parallel requests of its own
+INPUT_WORKERS = 4
+
+# Directory holding the cloud_render package, imported by Python expressions run inside Blender
+APP_PATH = str(Path(__file__).parent.parent)
+
+# Blender script remapping absolute paths, and the file it reads them from in the run directory
+REMAP_SCRIPT = str(Path(__file__).with_name("remap.py"))
+REMAP_FILE = "remap.json"
+
+
+def pull_blend(key: str, bucket_name: str, out_name: str) -> None:
+    """Pull a blend file from S3, validating it against the checksum saved when it was uploaded"""
+
+    head = s3.head_object(Bucket=bucket_name, Key=key)
+    expected = head["Metadata"].get("sha256")
+
+    # Download with parallel ranged requests
+    download = TransferLog("Downloaded blend file", head["ContentLength"])
+    s3.download_file(bucket_name, key, out_name, Callback=download, Config=transfer_config)
+    download.log()
+
+    # Blend files uploaded by older clients have no checksum
+    if expected is None:
+        return
+
+    digest = hashlib.sha256()
+    with open(out_name, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+
+    if digest.hexdigest() != expected:
+        raise ValueError(f"Checksum mismatch for {key}: expected {expected}, got {digest.hexdigest()}")
+
+
+def pull_chunks(manifest: Dict[str, Any], bucket_name: str, out_name: str) -> None:
+    """
+    Reassemble a blend file from the chunks listed by its manifest, validating every chunk and the whole file against
+    their checksums. Chunks are downloaded concurrently and written at their offset in the file, decompressing the
+    ones stored compressed without holding them in memory.
+    """
+
+    offsets, offset = [], 0
+    for _, size in manifest["chunks"]:
+        offsets.append(offset)
+        offset += size
+
+    def pull_chunk(index: int) -> None:
+        chunk_hash, size = manifest["chunks"][index]
+        obj = s3.get_object(Bucket=bucket_name, Key=f"chunks/{chunk_hash}")
+
+        # Decompress compressed chunks as they stream in
+        stream = obj["Body"]
+        if obj["Metadata"].get("codec") == "zstd":
+            stream = zstandard.ZstdDecompressor().stream_reader(stream)
+
+        digest, position = hashlib.sha256(), offsets[index]
+        for block in iter(lambda: stream.read(STREAM_BLOCK_SIZE), b""):
+            digest.update(block)
+            os.pwrite(descriptor, block, position)
+            position += len(block)
+
+        if digest.hexdigest() != chunk_hash or position - offsets[index] != size:
+            raise ValueError(f"Checksum mismatch for chunk {chunk_hash}")
+
+        download(size)
+
+    # Download every chunk into a file of the final size
+    download = TransferLog("Downloaded blend file", manifest["size"])
+    descriptor = os.open(out_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(descriptor, manifest["size"])
+        with ThreadPoolExecutor(max_workers=TRANSFER_CONCURRENCY) as executor:
+            list(executor.map(pull_chunk, range(len(manifest["chunks"]))))
+    finally:
+        os.close(descriptor)
+
+    download.log()
+
+    # Validate the reassembled file
+    digest = hashlib.sha256()
+    with open(out_name, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+
+    if digest.hexdigest() != manifest["sha256"]:
+        raise ValueError(f"Checksum mismatch for blend file: expected {manifest['sha256']}, got {digest.hexdigest()}")
+
+
+def pull_stored_blend(blend: str, bucket_name: str, out_name: str) -> None:
+    """Pull a blend file stored by its content, from its chunks or, for older clients, from a single object"""
+
+    try:
+        obj = s3.get_object(Bucket=bucket_name, Key=f"manifests/{blend}.json")
+    except botocore.exceptions.ClientError as error:
+        if error.response["Error"]["Code"] not in ("404", "NoSuchKey"):
+            raise error
 
-def pull_blend(job_name: str, bucket_name: str) -> str:
-    """Pull a job's blend file from S3"""
+        pull_blend(f"blobs/{blend}", bucket_name, out_name)
+        return
 
-    job_path = f"/cache/{job_name}"
-    out_name = f"{job_path}/main.blend"
+    pull_chunks(json.loads(obj["Body"].read()), bucket_name, out_name)
+
+
+def pull_package(
+    cache: BlendCache, stack: ExitStack, bucket_name: str, package: Dict[str, Any]
+) -> Tuple[str, Dict[str, str]]:
+    """
+    Use the cached blend file and external files of a package, pulling the ones missing from S3 concurrently. They
+    cannot be evicted until the stack exits.
+
+    :return: The path of the cached blend file, and the cached path of every file by where it is laid out.
+    """
+
+    layout = {f"files/{package['blend_path']}": package["blend_hash"]}
+    for asset in package["assets"]:
+        layout[f"files/{asset['path']}"] = asset["sha256"]
+
+    def use(file_hash: str) -> str:
+        return stack.enter_context(cache.use(file_hash, partial(pull_stored_blend, file_hash, bucket_name)))
+
+    file_hashes = sorted(set(layout.values()))
+    with ThreadPoolExecutor(max_workers=INPUT_WORKERS) as executor:
+        cached = dict(zip(file_hashes, executor.map(use, file_hashes)))
+
+    return cached[package["blend_hash"]], {rel_path: cached[file_hash] for rel_path, file_hash in layout.items()}
+
+
+def create_run_dir(blend_path: str, inputs: Dict[str, str]) -> str:
+    """
+    Create a directory private to this Blender invocation, holding links to the job's cached input files.
+    Blender resolves relative (//) output paths against the blend file's directory, so every file this invocation
+    renders ends up in the run directory, even though the cache is shared by every container on the host.
+
+    :param inputs: Cached path of every input file, by its path in the run directory.
+    """
+
+    run_path = f"{os.path.dirname(blend_path)}/runs/{uuid.uuid4().hex}"
+    os.makedirs(run_path)
+
+    # Hard link input files, falling back to symbolic links across file systems
+    for rel_path, cached_path in inputs.items():
+        path = f"{run_path}/{rel_path}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(cached_path, path)
+        except OSError:
+            os.symlink(cached_path, path)
+
+    return run_path
+
+
+def save_results(job_name: str, bucket_name: str, run_path: str, exclude: Set[str]) -> Tuple[List[str], int]:
+    """
+    Save the output of a single run to S3, returning the uploaded keys and their total size. Files are removed once
+    uploaded.
+
+    :param exclude: Paths of the run's input files, relative to the run directory.
+    """
+
+    def upload(path: Path) -> str:
+        rel_path = str(path).split(run_path + "/")[1]
+        key = f"jobs/{job_name}/{rel_path}"
+
+        typer.echo(f"Uploading file {path}...")
+        s3.upload_file(str(path), bucket_name, key, Callback=uploads, Config=transfer_config)
+        path.unlink()
+
+        return key
+
+    # Upload every file the run produced concurrently
+    paths = [
+        path for path in Path(run_path).rglob("*") if path.is_file() and str(path.relative_to(run_path)) not in exclude
+    ]
+    uploads = TransferLog("Uploaded outputs", sum(path.stat().st_size for path in paths))
+    with ThreadPoolExecutor(max_workers=UPLOAD_WORKERS) as executor:
+        keys = list(executor.map(upload, paths))
+
+    uploads.log()
+
+    return keys, uploads.total
+
+
+def save_status(job_name: str, bucket_name: str, marker: str, status: Dict[str, Any]) -> None:
+    """
+    Save the completion marker of a chunk of frames to S3, named after its first frame. Clients read these markers to
+    refresh a job without querying AWS Batch, so one is written whether the render succeeded or not. The tiles and
+    partial renders of a frame have markers of their own, which clients don't track.
+    """
+
+    s3.put_object(
+        Bucket=bucket_name,
+        Key=f"jobs/{job_name}/status/{marker}.json",
+        Body=bytes(json.dumps(status), "utf-8"),
+        ContentType="application/json",
+    )
 
-    # Create job path in cache dir if not exists
-    if not os.path.exists(job_path):
-        os.mkdir(job_path)
 
-    # Pull file if not found locally
-    if not os.path.exists(out_name):
-        s3.download_file(bucket_name, f"jobs/{job_name}/main.blend", out_name)
+def save_metrics(job_name: str, bucket_name: str, marker: str, metrics: Dict[str, Any]) -> None:
+    """
+    Save the phase timings of a chunk of frames to S3, named like its completion marker. They only inform
+    optimization, so failing to save them doesn't fail the render.
+    """
 
-    return out_name
+    try:
+        s3.put_object(
+            Bucket=bucket_name,
+            Key=f"jobs/{job_name}/metrics/{marker}.json",
+            Body=bytes(json.dumps(metrics), "utf-8"),
+            ContentType="application/json",
+        )
+    except botocore.exceptions.ClientError as error:
+        typer.echo(f"Failed to save metrics: {error}")
 
 
-def save_results(job_name: str, bucket_name: str) -> int:
-    """Save a job's output to S3"""
+def save_heartbeat(job_name: str, bucket_name: str, marker: str, heartbeat: Dict[str, Any]) -> None:
+    """
+    Save the progress of a running chunk of frames to S3, named like its completion marker. Heartbeats are only
+    informative, so failing to save one doesn't fail the render.
+    """
 
-    job_path = f"/cache/{job_name}"
+    try:
+        s3.put_object(
+            Bucket=bucket_name,
+            Key=f"jobs/{job_name}/progress/{marker}.json",
+            Body=bytes(json.dumps(heartbeat), "utf-8"),
+            ContentType="application/json",
+        )
+    except (botocore.exceptions.ClientError, botocore.exceptions.BotoCoreError) as error:
+        typer.echo(f"Failed to save heartbeat: {error}")
 
-    # Iterate over every file in the job directory
-    count = 0
-    for path in Path(job_path).rglob("*"):
 
-        # Ensure target is a file
-        if path.is_file() and path.name != "main.blend":
-            typer.echo(f"Uploading file {path}...")
+def pull_inputs(  # pylint: disable=too-many-arguments
+    cache: BlendCache, stack: ExitStack, job_name: str, bucket_name: str, blend: str, package: str
+) -> Tuple[str, str, Dict[str, str], Dict[str, str]]:
+    """
+    Use the cached input files of a job, pulling the ones missing from S3. Files are stored by their content hash, so
+    that hosts can reuse them across jobs. Jobs created by older clients only store a blend file, by its content hash
+    or under the job.
 
-            rel_path = str(path).split(job_path + "/")[1]
-            s3.upload_file(str(path), bucket_name, f"jobs/{job_name}/{rel_path}")
+    :return: The path of the cached blend file, its path in the run directory, the cached path of every input file by
+    its path in the run directory, and the absolute paths to remap.
+    """
 
-            count += 1
+    if package:
+        manifest = json.loads(s3.get_object(Bucket=bucket_name, Key=f"packages/{package}.json")["Body"].read())
+        blend_path, inputs = pull_package(cache, stack, bucket_name, manifest)
+        return blend_path, f"files/{manifest['blend_path']}", inputs, manifest["remap"]
 
-    return count
+    entry, fetch = blend, partial(pull_stored_blend, blend, bucket_name)
+    if not blend:
+        entry, fetch = job_name, partial(pull_blend, f"jobs/{job_name}/main.blend", bucket_name)
 
+    blend_path = stack.enter_context(cache.use(entry, fetch))
+    return blend_path, "main.blend", {"main.blend": blend_path}, {}
 
-def main(
+
+def run_blender(
+    run_path: str, blend_rel_path: str, remap: Dict[str, str], args: List[str], heartbeat: Heartbeat
+) -> Dict[str, Any]:
+    """
+    Run Blender on a job's blend file inside a run directory, failing if any Python script raises an error. Its
+    output is logged as it runs, and parsed for the render's progress and how long loading, rendering and saving
+    frames took.
+    """
+
+    # Point absolute paths stored in the blend file to where their files were laid out
+    remap_args = []
+    if remap:
+        with open(f"{run_path}/{REMAP_FILE}", "w", encoding="utf-8") as remap_file:
+            json.dump({path: f"{run_path}/files/{rel_path}" for path, rel_path in remap.items()}, remap_file)
+        remap_args = ["--python", REMAP_SCRIPT]
+
+    command = ["blender", "-b", f"{run_path}/{blend_rel_path}", "--python-exit-code", "1", *remap_args, *args]
+    timings = BlenderTimings()
+    with subprocess.Popen(
+        command,
+        cwd=run_path,
+        env=dict(os.environ, CLOUD_RENDER_REMAP=f"{run_path}/{REMAP_FILE}"),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        encoding="utf-8",
+        errors="replace",
+    ) as process:
+        for line in process.stdout:
+            typer.echo(line, nl=False)
+            timings.parse(line)
+            heartbeat.parse(line)
+
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, command)
+
+    return timings.to_dict()
+
+
+def frames_args(frame: int, last_frame: int, _: str) -> List[str]:
+    """Blender arguments rendering a chunk of frames in a single invocation"""
+
+    return ["-o", "./out/frame_####", "-s", str(frame), "-e", str(last_frame), "-j", "1", "-a"]
+
+
+def tile_args(frame: int, tile: int, tiles_x: int, tiles_y: int, _: str) -> List[str]:
+    """Blender arguments rendering a tile of a frame, restricting its render region through a Python expression"""
+
+    expression = (
+        f"import sys; sys.path.insert(0, {APP_PATH!r}); "
+        f"from cloud_render.tiles import render_tile; render_tile({tile}, {tiles_x}, {tiles_y})"
+    )
+
+    return ["--python-expr", expression, "-o", f"./tiles/tile_{tile}_####", "-f", str(frame)]
+
+
+def pull_outputs(job_name: str, bucket_name: str, run_path: str, rel_paths: List[str]) -> List[str]:
+    """Pull files saved by earlier stages of a job into the run directory concurrently, returning their paths"""
+
+    def pull(rel_path: str) -> str:
+        path = f"{run_path}/{rel_path}"
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        s3.download_file(bucket_name, f"jobs/{job_name}/{rel_path}", path, Config=transfer_config)
+        return path
+
+    with ThreadPoolExecutor(max_workers=INPUT_WORKERS) as executor:
+        return list(executor.map(pull, rel_paths))
+
+
+def stitch_args(  # pylint: disable=too-many-arguments
+    job_name: str, bucket_name: str, frame: int, tiles_x: int, tiles_y: int, run_path: str
+) -> List[str]:
+    """Blender arguments stitching the tiles of a frame together, once they are pulled into the run directory"""
+
+    typer.echo(f"Pulling {tiles_x * tiles_y} tiles from S3...")
+    paths = pull_outputs(
+        job_name, bucket_name, run_path, [f"tiles/tile_{tile}_{frame:04d}.exr" for tile in range(tiles_x * tiles_y)]
+    )
+
+    expression = (
+        f"import sys; sys.path.insert(0, {APP_PATH!r}); from cloud_render.tiles import stitch_tiles; "
+        f"stitch_tiles({paths!r}, {tiles_x}, {tiles_y}, {f'{run_path}/out/frame_{frame:04d}'!r})"
+    )
+
+    return ["--python-expr", expression]
+
+
+def samples_args(frame: int, split: int, splits: int, _: str) -> List[str]:
+    """Blender arguments rendering a share of the samples of a frame, with a seed set through a Python expression"""
+
+    expression = (
+        f"import sys; sys.path.insert(0, {APP_PATH!r}); "
+        f"from cloud_render.samples import render_samples; render_samples({split}, {splits})"
+    )
+
+    return ["--python-expr", expression, "-o", f"./samples/sample_{split}_####", "-f", str(frame)]
+
+
+def merge_args(job_name: str, bucket_name: str, frame: int, splits: int, run_path: str) -> List[str]:
+    """
+    Blender arguments saving the partial renders of a frame with the scene's output settings, once they are pulled
+    into the run directory and averaged.
+    """
+
+    typer.echo(f"Pulling {splits} partial renders from S3...")
+    paths = pull_outputs(
+        job_name, bucket_name, run_path, [f"samples/sample_{split}_{frame:04d}.exr" for split in range(splits)]
+    )
+
+    typer.echo("Merging partial renders...")
+    merged_path = f"{run_path}/samples/merged_{frame:04d}.exr"
+    merge_renders(paths, merged_path)
+
+    expression = (
+        f"import sys; sys.path.insert(0, {APP_PATH!r}); from cloud_render.samples import save_merged; "
+        f"save_merged({merged_path!r}, {f'{run_path}/out/frame_{frame:04d}'!r})"
+    )
+
+    return ["--python-expr", expression]
+
+
+def run_stage(  # pylint: disable=too-many-arguments,too-many-locals
+    job_name: str,
+    bucket_name: str,
+    blend: str,
+    package: str,
+    stage_args: Callable[[str], List[str]],
+    metrics: Metrics,
+    heartbeat: Heartbeat,
+) -> List[str]:
+    """
+    Run a stage of a job, such as rendering a chunk of frames, in a run directory holding its input files. Save
+    the files it produced to S3, returning their keys. Every phase is timed, and Blender's progress published.
+
+    :param stage_args: Prepares the run directory for the stage, returning the Blender arguments running it.
+    """
+
+    cache = BlendCache()
+    with ExitStack() as stack:
+        # Pull the blend file and its external files from S3, unless they are cached on this host
+        with metrics.phase("pull") as pull:
+            typer.echo("Pulling blend file from S3...")
+            blend_path, blend_rel_path, inputs, remap = pull_inputs(cache, stack, job_name, bucket_name, blend, package)
+            pull.update(bytes=cache.fetched_bytes, cache_hits=cache.hits, cache_misses=cache.misses)
+
+        cache.report()
+
+        # Run blender in a directory of its own
+        run_path = create_run_dir(blend_path, inputs)
+        try:
+            with metrics.phase("prepare"):
+                args = stage_args(run_path)
+
+            exclude = {str(path.relative_to(run_path)) for path in Path(run_path).rglob("*") if path.is_file()}
+
+            typer.echo("Rendering...")
+            with metrics.phase("blender") as blender:
+                blender.update(run_blender(run_path, blend_rel_path, remap, args, heartbeat))
+
+            # Copy results back to S3
+            with metrics.phase("upload") as upload:
+                keys, upload["bytes"] = save_results(job_name, bucket_name, run_path, {*exclude, REMAP_FILE})
+                upload["files"] = len(keys)
+
+            typer.echo(f"Copied {len(keys)} files to bucket.")
+        finally:
+            shutil.rmtree(run_path, ignore_errors=True)
+
+    return keys
+
+
+def main(  # pylint: disable=too-many-arguments,too-many-locals
     job_name: str = typer.Argument(..., help="Name of the blend file to attempt to render"),
-    frame: int = typer.Option(..., help="Framer number to render"),
+    frame: int = typer.Option(..., help="First frame to render. Array jobs offset it by their array index."),
+    end_frame: int = typer.Option(..., help="Last frame of the job. Chunks never render past it."),
+    chunk_size: int = typer.Option(1, help="Number of consecutive frames to render"),
+    blend: str = typer.Option("", help="SHA-256 of the job's blend file, which is stored by its content"),
+    package: str = typer.Option("", help="SHA-256 of the package listing the job's blend file and external files"),
+    tiles_x: int = typer.Option(1, help="Number of columns of tiles a single frame is split into"),
+    tiles_y: int = typer.Option(1, help="Number of rows of tiles a single frame is split into"),
+    sample_splits: int = typer.Option(1, help="Number of partial renders a single frame's samples are split into"),
+    stage: str = typer.Option(
+        "render", help="Stage of the job to run: render, stitch the tiles of a frame, or merge its partial renders"
+    ),
     bucket_name: str = typer.Option(..., help="Name of the S3 bucket to use for storage"),
 ) -> None:
     """Entrypoint method"""
 
-    typer.echo(f"Will render job {job_name} on frame #{frame}.")
+    metrics = Metrics()
+    array_index = os.environ.get("AWS_BATCH_JOB_ARRAY_INDEX")
+    last_frame = min(frame + chunk_size - 1, end_frame)
+    marker = str(frame)
 
-    # Pull blend file from S3
-    typer.echo("Pulling blend file from S3...")
-    blend_path = pull_blend(job_name, bucket_name)
+    # Children of an array job splitting a frame render the tile or the share of samples at their index, while
+    # stitching or merging waits for all of them
+    if stage == "stitch":
+        typer.echo(f"Will stitch the {tiles_x}x{tiles_y} tiles of job {job_name} on frame #{frame}.")
+        stage_args = partial(stitch_args, job_name, bucket_name, frame, tiles_x, tiles_y)
+    elif stage == "merge":
+        typer.echo(f"Will merge the {sample_splits} partial renders of job {job_name} on frame #{frame}.")
+        stage_args = partial(merge_args, job_name, bucket_name, frame, sample_splits)
+    elif tiles_x * tiles_y > 1:
+        tile = int(array_index or 0)
+        typer.echo(f"Will render tile {tile} of {tiles_x}x{tiles_y} of job {job_name} on frame #{frame}.")
+        stage_args = partial(tile_args, frame, tile, tiles_x, tiles_y)
+        marker = f"{frame}-tile-{tile}"
+    elif sample_splits > 1:
+        split = int(array_index or 0)
+        typer.echo(f"Will render partial render {split} of {sample_splits} of job {job_name} on frame #{frame}.")
+        stage_args = partial(samples_args, frame, split, sample_splits)
+        marker = f"{frame}-samples-{split}"
 
-    # Run blender
-    typer.echo("Rendering...")
+    # Children of an array job render the chunk at their index
+    else:
+        if array_index is not None:
+            frame += int(array_index) * chunk_size
+            last_frame = min(frame + chunk_size - 1, end_frame)
+            marker = str(frame)
 
-    job_path = f"/cache/{job_name}"
-    subprocess.run(
-        ["blender", "-b", blend_path, "-o", "./out/frame_####", "-f", str(frame)],
-        check=True,
-        cwd=job_path,
-    )
+        typer.echo(f"Will render job {job_name} on frames #{frame} to #{last_frame}.")
+        stage_args = partial(frames_args, frame, last_frame)
 
-    # Copy results back to S3
-    save_count = save_results(job_name, bucket_name)
-    typer.echo(f"Copied {save_count} files to bucket.")
+    # Render, recording how it went in the chunk's completion marker
+    status: Dict[str, Any] = dict(
+        frame=frame,
+        end_frame=last_frame,
+        host=socket.gethostname(),
+        batch_job_id=os.environ.get("AWS_BATCH_JOB_ID"),
+        attempt=os.environ.get("AWS_BATCH_JOB_ATTEMPT"),
+        started_at=time.time(),
+        stopped_at=None,
+        status="FAILED",
+        exit_code=None,
+        error=None,
+        outputs=[],
+    )
+    heartbeat = Heartbeat(partial(save_heartbeat, job_name, bucket_name, marker), last_frame - frame + 1)
+    try:
+        status["outputs"] = run_stage(job_name, bucket_name, blend, package, stage_args, metrics, heartbeat)
+        status["status"] = "SUCCEEDED"
+        status["exit_code"] = 0
+    except Exception as error:
+        status["exit_code"] = getattr(error, "returncode", None)
+        status["error"] = str(error)
+        raise
+    finally:
+        heartbeat.close()
+        status["stopped_at"] = time.time()
+        save_status(job_name, bucket_name, marker, status)
+        save_metrics(
+            job_name,
+            bucket_name,
+            marker,
+            metrics.to_dict(stage=stage, **{key: value for key, value in status.items() if key != "outputs"}),
+        )
 
     # All done
     typer.echo("Rendered image successfully!", color=typer.colors.GREEN)
@@ -0,0 +1,181 @@
+"""
+Host-level cache of blend files and the external files they use, shared by every container on the same host through
+the /cache volume.
+"""
+
+from typing import Callable, Iterator, List, Tuple
+from contextlib import contextmanager
+from pathlib import Path
+import fcntl
+import shutil
+import os
+
+import typer
+
+# Directory of the cache volume mounted from the host. Pointing it to a directory under /dev/shm keeps blend files
+# in memory instead, provided the job definition gives containers enough shared memory.
+CACHE_ROOT = os.environ.get("CACHE_ROOT", "/cache")
+
+# Maximum size of the cached blend files, in GB. Entries in use are never evicted, so it can be exceeded.
+CACHE_MAX_GB = float(os.environ.get("CACHE_MAX_GB", "20"))
+
+# Files of a cache entry
+BLEND_FILE = "main.blend"
+LOCK_FILE = ".lock"
+DOWNLOAD_LOCK_FILE = ".download.lock"
+
+
+class BlendCache:  # pylint: disable=too-many-instance-attributes
+    """
+    The BlendCache keeps the blend file of every job rendered on this host under /cache/<entry>/main.blend, where
+    entries are named after the file's content hash, or the job for jobs created by older clients. The external files
+    blend files use are cached the same way.
+
+    Containers hold a shared lock on a job's entry while they use it. Once the cached blend files exceed the byte
+    budget, the least recently used entries that nobody holds a lock on are evicted.
+
+    Blend files are downloaded by a single container at a time: the others wait for it, then use its download.
+    """
+
+    def __init__(self, root: str = CACHE_ROOT, max_bytes: int = int(CACHE_MAX_GB * 1024**3)):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self.fetched_bytes = 0
+
+    def _lock(self, job_name: str, operation: int) -> int:
+        """Lock a job's entry, creating it if needed. Return the locked file descriptor."""
+
+        entry_path = self.root / job_name
+        while True:
+            entry_path.mkdir(parents=True, exist_ok=True)
+            try:
+                descriptor = os.open(str(entry_path / LOCK_FILE), os.O_RDWR | os.O_CREAT)
+            except FileNotFoundError:
+                # Evicted between creating the directory and opening the lock
+                continue
+
+            try:
+                fcntl.flock(descriptor, operation)
+            except BlockingIOError:
+                os.close(descriptor)
+                raise
+
+            # Retry if the entry was evicted while waiting for the lock, since the lock file is then deleted
+            try:
+                if os.stat(str(entry_path / LOCK_FILE)).st_ino == os.fstat(descriptor).st_ino:
+                    return descriptor
+            except FileNotFoundError:
+                pass
+
+            os.close(descriptor)
+
+    def _fetch(self, job_name: str, fetch: Callable[[str], None]) -> None:
+        """Fetch a job's blend file into the cache, unless another container already did while we waited"""
+
+        entry_path = self.root / job_name
+        blend_path = entry_path / BLEND_FILE
+
+        # Only a single container downloads at a time
+        with open(str(entry_path / DOWNLOAD_LOCK_FILE), "a", encoding="utf-8") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                typer.echo("Waiting for another container to download the blend file...")
+                self.waits += 1
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+
+            if blend_path.exists():
+                self.hits += 1
+                return
+
+            # Download to a temporary file, so the blend file is never seen half written
+            self.misses += 1
+            tmp_path = entry_path / f"{BLEND_FILE}.{os.getpid()}.tmp"
+            try:
+                fetch(str(tmp_path))
+                self.fetched_bytes += tmp_path.stat().st_size
+                os.replace(str(tmp_path), str(blend_path))
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+
+    @contextmanager
+    def use(self, job_name: str, fetch: Callable[[str], None]) -> Iterator[str]:
+        """
+        Use a job's cached blend file, fetching it on a miss. It cannot be evicted until the context exits.
+
+        :param fetch: Downloads the blend file to the given path, raising an error if it is not valid.
+        """
+
+        descriptor = self._lock(job_name, fcntl.LOCK_SH)
+        try:
+            blend_path = self.root / job_name / BLEND_FILE
+
+            # Fetch the blend file on a miss
+            if blend_path.exists():
+                self.hits += 1
+            else:
+                self._fetch(job_name, fetch)
+                self.evict()
+
+            # Mark the entry as recently used
+            os.utime(str(blend_path))
+
+            yield str(blend_path)
+        finally:
+            fcntl.flock(descriptor, fcntl.LOCK_UN)
+            os.close(descriptor)
+
+    def entries(self) -> List[Tuple[float, int, str]]:
+        """List the (last access time, size, job name) of every cached blend file, least recently used first"""
+
+        entries = []
+        for entry_path in self.root.iterdir():
+            try:
+                stat = (entry_path / BLEND_FILE).stat()
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+
+            entries.append((stat.st_atime, stat.st_size, entry_path.name))
+
+        return sorted(entries)
+
+    def evict(self) -> None:
+        """Evict the least recently used entries that are not in use, until the cache fits within its budget"""
+
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, job_name in entries:
+            if total <= self.max_bytes:
+                break
+
+            # Skip entries in use by any container
+            try:
+                descriptor = self._lock(job_name, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+
+            try:
+                shutil.rmtree(str(self.root / job_name), ignore_errors=True)
+            finally:
+                os.close(descriptor)
+
+            total -= size
+            self.evictions += 1
+            self.evicted_bytes += size
+
+    def report(self) -> None:
+        """Log the cache counters"""
+
+        used_mb = sum(size for _, size, _ in self.entries()) / 1024**2
+        typer.echo(
+            f"Blend cache: {self.hits} hits, {self.misses} misses, {self.waits} waits, {self.evictions} evictions "
+            f"({self.evicted_bytes / 1024**2:.1f} MB freed), {used_mb:.1f}/{self.max_bytes / 1024**2:.1f} MB used"
+        )
@@ -0,0 +1,186 @@
+"""
+Streaming reader and writer of the scanline OpenEXR files Blender renders, used to average the partial renders of a
+frame one chunk of scanlines at a time, so that none of them is ever held in memory whole.
+
+Only what Blender writes is supported: single part scanline files, either uncompressed or ZIP compressed.
+"""
+
+from typing import BinaryIO, List, Tuple
+from contextlib import ExitStack
+import struct
+import zlib
+
+import numpy
+
+# Magic number every OpenEXR file starts with
+MAGIC = 20000630
+
+# Flags of the version field marking tiled, deep and multipart files
+UNSUPPORTED_FLAGS = 0x200 | 0x800 | 0x1000
+
+# Scanlines per chunk of every supported compression: NONE, ZIPS and ZIP
+CHUNK_SCANLINES = {0: 1, 2: 1, 3: 16}
+
+# Data type of every pixel type: UINT, HALF and FLOAT
+PIXEL_TYPES = {0: numpy.dtype("<u4"), 1: numpy.dtype("<f2"), 2: numpy.dtype("<f4")}
+
+
+def read_string(file: BinaryIO) -> str:
+    """Read a null terminated string"""
+
+    chars = bytearray()
+    for char in iter(lambda: file.read(1), b"\0"):
+        if not char:
+            raise ValueError("Truncated OpenEXR header")
+        chars += char
+
+    return chars.decode()
+
+
+def parse_channels(value: bytes, width: int) -> numpy.dtype:
+    """
+    Parse the channel list of a file into the data type of its scanlines: every channel in turn, as an array of a
+    value per pixel.
+    """
+
+    fields, position = [], 0
+    while value[position] != 0:
+        end = value.index(b"\0", position)
+        pixel_type, _, x_sampling, y_sampling = struct.unpack_from("<iB3xii", value, end + 1)
+        if (x_sampling, y_sampling) != (1, 1):
+            raise ValueError("Subsampled OpenEXR channels are not supported")
+
+        fields.append((value[position:end].decode(), PIXEL_TYPES[pixel_type], (width,)))
+        position = end + 17
+
+    return numpy.dtype(fields)
+
+
+def unpredict(data: bytes) -> bytes:
+    """Undo the byte predictor and reordering ZIP compression applies to data before deflating it"""
+
+    # Every byte was stored as its difference to the previous one, offset by 128
+    deltas = numpy.frombuffer(data, dtype=numpy.uint8).copy()
+    deltas[1:] -= 128
+    reordered = numpy.cumsum(deltas, dtype=numpy.uint8)
+
+    # The bytes at even indexes come first, followed by the odd ones
+    half = (len(reordered) + 1) // 2
+    raw = numpy.empty_like(reordered)
+    raw[0::2], raw[1::2] = reordered[:half], reordered[half:]
+
+    return raw.tobytes()
+
+
+def predict(data: bytes) -> bytes:
+    """Reorder and predict data the way ZIP compression does before deflating it"""
+
+    raw = numpy.frombuffer(data, dtype=numpy.uint8)
+    reordered = numpy.concatenate([raw[0::2], raw[1::2]])
+
+    deltas = reordered.copy()
+    deltas[1:] = reordered[1:] - reordered[:-1] + 128
+
+    return deltas.tobytes()
+
+
+class ExrFile:
+    """Scanline OpenEXR file, read one chunk of scanlines at a time"""
+
+    def __init__(self, file: BinaryIO):
+        self.file = file
+
+        magic, version = struct.unpack("<iI", file.read(8))
+        if magic != MAGIC:
+            raise ValueError(f"{file.name} is not an OpenEXR file")
+        if version & UNSUPPORTED_FLAGS:
+            raise ValueError(f"{file.name} is not a single part scanline OpenEXR file")
+
+        # Read the attributes the pixels are laid out by
+        attributes = {}
+        for name in iter(lambda: read_string(file), ""):
+            read_string(file)
+            attributes[name] = file.read(struct.unpack("<i", file.read(4))[0])
+
+        self.compression = attributes["compression"][0]
+        if self.compression not in CHUNK_SCANLINES:
+            raise ValueError(f"OpenEXR compression {self.compression} of {file.name} is not supported")
+
+        self.window = struct.unpack("<4i", attributes["dataWindow"])
+        width, height = self.window[2] - self.window[0] + 1, self.window[3] - self.window[1] + 1
+        self.scanlines = CHUNK_SCANLINES[self.compression]
+        self.dtype = parse_channels(attributes["channels"], width)
+
+        # Keep the header as is, for writing files laid out the same way
+        header_size = file.tell()
+        file.seek(0)
+        self.header = file.read(header_size)
+
+        chunk_count = -(-height // self.scanlines)
+        self.offsets = numpy.frombuffer(file.read(chunk_count * 8), dtype="<u8")
+
+    def read_chunk(self, index: int) -> Tuple[int, numpy.ndarray]:
+        """Read a chunk of scanlines, returning the y coordinate of its first scanline and an array of its scanlines"""
+
+        self.file.seek(int(self.offsets[index]))
+        y, size = struct.unpack("<ii", self.file.read(8))
+        data = self.file.read(size)
+
+        # Chunks that compression would make larger are stored uncompressed
+        scanlines = min(self.scanlines, self.window[3] - y + 1)
+        if len(data) < scanlines * self.dtype.itemsize:
+            data = unpredict(zlib.decompress(data))
+
+        return y, numpy.frombuffer(data, dtype=self.dtype)
+
+    def encode_chunk(self, y: int, scanlines: numpy.ndarray) -> bytes:
+        """Encode a chunk of scanlines with the file's compression"""
+
+        data = scanlines.tobytes()
+        if self.compression != 0:
+            compressed = zlib.compress(predict(data))
+            if len(compressed) < len(data):
+                data = compressed
+
+        return struct.pack("<ii", y, len(data)) + data
+
+
+def average(chunks: List[numpy.ndarray]) -> numpy.ndarray:
+    """Average the scanlines of a chunk across renders. Integer channels hold IDs, which are taken from the first."""
+
+    result = chunks[0].copy()
+    for name in result.dtype.names:
+        if result.dtype[name].subdtype[0].kind == "f":
+            total = sum(chunk[name].astype(numpy.float32) for chunk in chunks)
+            result[name] = total / len(chunks)
+
+    return result
+
+
+def merge_renders(paths: List[str], output_path: str) -> None:
+    """
+    Average renders of the same frame into a file laid out like the first of them, holding a single chunk of
+    scanlines of each render in memory at a time.
+    """
+
+    with ExitStack() as stack:
+        renders = [ExrFile(stack.enter_context(open(path, "rb"))) for path in paths]
+        first = renders[0]
+        for path, render in zip(paths, renders):
+            if render.dtype != first.dtype or render.window != first.window or render.scanlines != first.scanlines:
+                raise ValueError(f"{path} is not laid out like {paths[0]}")
+
+        # Write the header and leave room for the offset table, filled in once every chunk is written
+        output = stack.enter_context(open(output_path, "wb"))
+        output.write(first.header)
+        table_offset = output.tell()
+        output.write(bytes(first.offsets.nbytes))
+
+        offsets = []
+        for index in range(len(first.offsets)):
+            chunks = [render.read_chunk(index) for render in renders]
+            offsets.append(output.tell())
+            output.write(first.encode_chunk(chunks[0][0], average([scanlines for _, scanlines in chunks])))
+
+        output.seek(table_offset)
+        output.write(numpy.array(offsets, dtype="<u8").tobytes())
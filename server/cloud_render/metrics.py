@@ -0,0 +1,94 @@
+"""
+Timings of the phases of a container's work, saved to S3 so that clients can tell where the time of slow frames went.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional
+from contextlib import contextmanager
+import time
+import os
+import re
+
+# Line Blender prints once it saved a frame, with how long rendering and saving it took
+FRAME_TIME = re.compile(r"^\s*Time: ([\d:.]+) \(Saving: ([\d:.]+)\)")
+
+
+def process_started_at() -> float:
+    """Time this process started as seconds since the epoch, so that interpreter startup and imports are timed too"""
+
+    try:
+        with open("/proc/self/stat", encoding="utf-8") as stat_file:
+            start_ticks = int(stat_file.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime", encoding="utf-8") as uptime_file:
+            uptime = float(uptime_file.read().split()[0])
+    except OSError:
+        return time.time()
+
+    return time.time() - uptime + start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+def parse_duration(text: str) -> float:
+    """Parse a duration printed by Blender, such as 01:02:03.45 or 02:03.45, into seconds"""
+
+    seconds = 0.0
+    for part in text.split(":"):
+        seconds = seconds * 60 + float(part)
+
+    return seconds
+
+
+class Metrics:
+    """Timings of the phases of a container's work, along with what they transferred"""
+
+    def __init__(self):
+        self.started_at = process_started_at()
+        self.phases: Dict[str, Dict[str, Any]] = {"startup": dict(seconds=round(time.time() - self.started_at, 3))}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Time a phase, yielding a dict to record its other measurements in. Phases that fail are recorded too."""
+
+        values: Dict[str, Any] = {}
+        start_time = time.monotonic()
+        try:
+            yield values
+        finally:
+            self.phases[name] = dict(values, seconds=round(time.monotonic() - start_time, 3))
+
+    def to_dict(self, **fields) -> Dict[str, Any]:
+        """Record of the container's timings, along with fields describing its work"""
+
+        return dict(fields, started_at=self.started_at, phases=self.phases)
+
+
+class BlenderTimings:
+    """Timings parsed from Blender's output as it runs: loading the blend file, then rendering and saving frames"""
+
+    def __init__(self):
+        self.start_time = time.monotonic()
+        self.load_seconds: Optional[float] = None
+        self.render_seconds: List[float] = []
+        self.saving_seconds: List[float] = []
+
+    def parse(self, line: str) -> None:
+        """Parse a line of Blender's output"""
+
+        # Blender reports progress on every frame once the blend file is loaded
+        if self.load_seconds is None and line.startswith("Fra:"):
+            self.load_seconds = time.monotonic() - self.start_time
+
+        match = FRAME_TIME.match(line)
+        if match is not None:
+            self.render_seconds.append(parse_duration(match.group(1)))
+            self.saving_seconds.append(parse_duration(match.group(2)))
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Timings parsed so far, leaving out what Blender didn't report"""
+
+        timings: Dict[str, Any] = dict(frames=len(self.render_seconds))
+        if self.load_seconds is not None:
+            timings["load_seconds"] = round(self.load_seconds, 3)
+        if self.render_seconds:
+            timings["render_seconds"] = round(sum(self.render_seconds), 3)
+            timings["saving_seconds"] = round(sum(self.saving_seconds), 3)
+
+        return timings
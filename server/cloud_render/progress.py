@@ -0,0 +1,116 @@
+"""
+Progress of a running render parsed from Blender's output, published as heartbeats so that clients can tell slow
+frames from hung ones.
+"""
+
+from typing import Any, Callable, Dict, Optional
+from concurrent.futures import Future, ThreadPoolExecutor
+import time
+import os
+import re
+
+from .metrics import FRAME_TIME, parse_duration
+
+# Seconds between heartbeats of a running render
+HEARTBEAT_INTERVAL = float(os.environ.get("HEARTBEAT_INTERVAL", "15"))
+
+# Parts of the status lines Blender prints while rendering, like:
+# Fra:1 Mem:38.25M (Peak 39.61M) | Time:00:00.68 | Remaining:00:04.12 | Mem:6.09M, Peak:6.09M | Scene | Sample 12/128
+STATUS_FRAME = re.compile(r"^Fra:(\d+) ")
+STATUS_REMAINING = re.compile(r"Remaining:([\d:.]+)")
+STATUS_PEAK = re.compile(r"Peak[: ]([\d.]+)M")
+
+# Progress of the frame: Cycles samples or tiles, and Eevee samples
+STATUS_PROGRESS = (
+    re.compile(r"Sample (\d+)/(\d+)"),
+    re.compile(r"Rendered (\d+)/(\d+) Tiles"),
+    re.compile(r"Rendering (\d+) / (\d+) samples"),
+)
+
+
+class Heartbeat:  # pylint: disable=too-many-instance-attributes
+    """
+    Progress of a chunk of frames, parsed from Blender's output as it renders. It is published periodically, and
+    whenever a frame is done.
+
+    Heartbeats are published from a thread of their own, so that slow uploads never hold up reading Blender's output,
+    which would stall Blender once its pipe is full. A heartbeat due while the previous one is still being published
+    is dropped, since the next one supersedes it.
+    """
+
+    def __init__(self, publish: Callable[[Dict[str, Any]], None], frame_count: int):
+        self.publish_heartbeat = publish
+        self.frame_count = frame_count
+        self.published_at = time.monotonic()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.in_flight: Optional[Future] = None
+
+        self.frame: Optional[int] = None
+        self.frames_done = 0
+        self.frame_progress = 0.0
+        self.remaining_seconds: Optional[float] = None
+        self.peak_memory_mb: Optional[float] = None
+
+    @property
+    def percent(self) -> float:
+        """Percentage of the chunk rendered so far"""
+
+        return min(100 * (self.frames_done + self.frame_progress) / self.frame_count, 100.0)
+
+    def parse(self, line: str) -> None:
+        """Parse a line of Blender's output, publishing a heartbeat when one is due"""
+
+        # Frames are done once Blender reports how long saving them took
+        if FRAME_TIME.match(line) is not None:
+            self.frames_done += 1
+            self.frame_progress, self.remaining_seconds = 0.0, None
+            self.publish()
+            return
+
+        match = STATUS_FRAME.match(line)
+        if match is None:
+            return
+
+        self.frame = int(match.group(1))
+        for peak in STATUS_PEAK.findall(line):
+            self.peak_memory_mb = max(self.peak_memory_mb or 0.0, float(peak))
+
+        remaining = STATUS_REMAINING.search(line)
+        if remaining is not None:
+            self.remaining_seconds = parse_duration(remaining.group(1))
+
+        # Render passes of every view layer start over, so progress never goes back within a frame
+        for pattern in STATUS_PROGRESS:
+            progress = pattern.search(line)
+            if progress is not None:
+                done, total = int(progress.group(1)), int(progress.group(2))
+                self.frame_progress = max(self.frame_progress, done / max(total, 1))
+                break
+
+        if time.monotonic() - self.published_at >= HEARTBEAT_INTERVAL:
+            self.publish()
+
+    def publish(self) -> None:
+        """Publish the current progress in the background, unless the previous heartbeat is still being published"""
+
+        self.published_at = time.monotonic()
+        if self.in_flight is not None and not self.in_flight.done():
+            return
+
+        self.in_flight = self.executor.submit(
+            self.publish_heartbeat,
+            dict(
+                frame=self.frame,
+                frames_done=self.frames_done,
+                frame_count=self.frame_count,
+                percent=round(self.percent, 1),
+                remaining_seconds=self.remaining_seconds,
+                peak_memory_mb=self.peak_memory_mb,
+                updated_at=time.time(),
+            ),
+        )
+
+    def close(self) -> None:
+        """Stop publishing heartbeats, letting the one being published finish in the background"""
+
+        self.executor.shutdown(wait=False)
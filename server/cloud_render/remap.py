@@ -0,0 +1,31 @@
+"""
+Script run by Blender before rendering a job, pointing the absolute paths stored in its blend file to where the
+render host laid out the files they refer to. Relative (//) paths need no remapping, since files are laid out
+around the blend file like they were on the machine that created the job.
+
+The remapped paths are read from the JSON file at $CLOUD_RENDER_REMAP.
+"""
+
+import json
+import os
+
+import bpy
+
+# Datablocks that reference external files
+COLLECTIONS = ("images", "movieclips", "fonts", "libraries", "cache_files", "volumes")
+
+with open(os.environ["CLOUD_RENDER_REMAP"], encoding="utf-8") as remap_file:
+    remap = json.load(remap_file)
+
+for collection in COLLECTIONS:
+    for datablock in getattr(bpy.data, collection):
+        # Paths of linked datablocks are stored in their library, which can't be edited
+        if datablock.library is not None or datablock.filepath not in remap:
+            continue
+
+        print(f"Remapping {datablock.filepath} to {remap[datablock.filepath]}")
+        datablock.filepath = remap[datablock.filepath]
+
+        # Libraries failed to load from their original path
+        if collection == "libraries":
+            datablock.reload()
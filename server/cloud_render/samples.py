@@ -0,0 +1,80 @@
+"""
+Rendering single frames as several partial renders, imported by Blender through a startup Python expression.
+
+Every partial render takes an equal share of the scene's Cycles samples with a seed of its own, so that averaging them
+gives a render of at least as many samples. They are saved as float multilayer EXRs, averaging every pass. Denoising,
+compositing and the sequencer don't commute with averaging and can't be applied to the merged render, so scenes using
+them are rejected rather than rendered without them.
+"""
+
+from typing import List
+import math
+import os
+
+import bpy
+
+# Compositor nodes that pass the render through unchanged
+PASSTHROUGH_NODES = ("R_LAYERS", "COMPOSITE", "VIEWER")
+
+
+def post_processing(scene: bpy.types.Scene) -> List[str]:
+    """Steps applied to the scene's renders after sampling, which partial renders can't be split by"""
+
+    steps = []
+    if scene.cycles.use_denoising:
+        steps.append("denoising")
+    if scene.use_nodes and scene.render.use_compositing:
+        if any(node.type not in PASSTHROUGH_NODES for node in scene.node_tree.nodes):
+            steps.append("compositing")
+    if scene.render.use_sequencer and scene.sequence_editor is not None and scene.sequence_editor.sequences_all:
+        steps.append("the sequencer")
+
+    return steps
+
+
+def render_samples(split: int, splits: int) -> None:
+    """Render a share of the samples of a frame with a seed of its own, saved as a lossless multilayer EXR"""
+
+    scene = bpy.context.scene
+    if scene.render.engine != "CYCLES":
+        raise ValueError(f"Only Cycles renders can be split by samples, not {scene.render.engine} ones")
+
+    steps = post_processing(scene)
+    if steps:
+        raise ValueError(f"Renders using {' and '.join(steps)} can't be split by samples, render them in tiles instead")
+
+    # Offset the seed by the split's index, so that every partial render samples different paths
+    cycles = scene.cycles
+    cycles.samples = math.ceil(cycles.samples / splits)
+    cycles.seed += split
+
+    # Leave the render as sampled, in every pass
+    scene.render.use_compositing = False
+    scene.render.use_sequencer = False
+
+    settings = scene.render.image_settings
+    settings.file_format = "OPEN_EXR_MULTILAYER"
+    settings.color_depth = "32"
+    settings.exr_codec = "ZIP"
+
+    print(f"Rendering split {split} of {splits}: {cycles.samples} samples with seed {cycles.seed}")
+
+
+def save_merged(merged_path: str, output_path: str) -> None:
+    """
+    Save the merged partial renders of a frame with the scene's output settings. Scenes rendering to multilayer EXRs
+    get the merged file as is, with every pass.
+
+    :param output_path: Path of the frame, without its extension.
+    """
+
+    scene = bpy.context.scene
+    output_path += scene.render.file_extension
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    if scene.render.image_settings.file_format == "OPEN_EXR_MULTILAYER":
+        os.replace(merged_path, output_path)
+    else:
+        bpy.data.images.load(merged_path).save_render(output_path, scene=scene)
+
+    print(f"Saved merged partial renders to {output_path}")
@@ -0,0 +1,134 @@
+"""
+Tiled rendering of single frames, imported by Blender through a startup Python expression.
+
+Every tile is rendered by a separate container as a float EXR, cropped to its render region, and extends into its
+neighbours by OVERLAP pixels. Stitching blends overlapping pixels with linear ramps that add up to 1, which hides the
+seams left by per-tile denoising and sampling noise.
+"""
+
+from typing import List, Tuple
+import os
+
+import bpy
+import numpy
+
+# Pixels by which tiles extend past their border into their neighbours
+OVERLAP = 32
+
+
+def resolution(scene: bpy.types.Scene) -> Tuple[int, int]:
+    """Size of the rendered frame in pixels"""
+
+    scale = scene.render.resolution_percentage / 100
+    return int(scene.render.resolution_x * scale), int(scene.render.resolution_y * scale)
+
+
+def tile_rect(index: int, tiles_x: int, tiles_y: int, width: int, height: int) -> Tuple[int, int, int, int]:
+    """Pixel rectangle (xmin, ymin, xmax, ymax) of a tile including its overlap, from the bottom left corner"""
+
+    column, row = index % tiles_x, index // tiles_x
+
+    return (
+        max(column * width // tiles_x - OVERLAP, 0),
+        max(row * height // tiles_y - OVERLAP, 0),
+        min((column + 1) * width // tiles_x + OVERLAP, width),
+        min((row + 1) * height // tiles_y + OVERLAP, height),
+    )
+
+
+def render_tile(index: int, tiles_x: int, tiles_y: int) -> None:
+    """Restrict rendering to a tile, saved as a lossless float EXR for stitching"""
+
+    scene = bpy.context.scene
+    width, height = resolution(scene)
+    xmin, ymin, xmax, ymax = tile_rect(index, tiles_x, tiles_y, width, height)
+
+    # Blender truncates the border times the resolution, so aim for the middle of the pixel
+    render = scene.render
+    render.use_border = True
+    render.use_crop_to_border = True
+    render.border_min_x, render.border_max_x = (xmin + 0.5) / width, (xmax + 0.5) / width
+    render.border_min_y, render.border_max_y = (ymin + 0.5) / height, (ymax + 0.5) / height
+
+    render.image_settings.file_format = "OPEN_EXR"
+    render.image_settings.color_mode = "RGBA"
+    render.image_settings.color_depth = "32"
+
+    print(f"Rendering tile {index} of {tiles_x}x{tiles_y}: pixels {xmin}-{xmax} x {ymin}-{ymax}")
+
+
+def ramp(start: int, stop: int, size: int, blend_start: bool, blend_stop: bool) -> numpy.ndarray:
+    """Weights of the pixels of a tile along one axis, ramping up and down over the overlap with its neighbours"""
+
+    weights = numpy.ones(stop - start, dtype=numpy.float32)
+    positions = numpy.arange(stop - start, dtype=numpy.float32) + 0.5
+
+    if blend_start and start > 0:
+        weights = numpy.minimum(weights, positions / (2 * OVERLAP))
+    if blend_stop and stop < size:
+        weights = numpy.minimum(weights, (stop - start - positions) / (2 * OVERLAP))
+
+    return numpy.clip(weights, 0, 1)
+
+
+def tile_region(
+    index: int, tiles_x: int, tiles_y: int, width: int, height: int
+) -> Tuple[Tuple[slice, slice], numpy.ndarray]:
+    """
+    Region of the frame a tile covers, as rows and columns, and the weight of each of its pixels when stitching. Weights
+    ramp over the sides the tile shares with its neighbours.
+    """
+
+    xmin, ymin, xmax, ymax = tile_rect(index, tiles_x, tiles_y, width, height)
+    column, row = index % tiles_x, index // tiles_x
+
+    weight = numpy.outer(
+        ramp(ymin, ymax, height, row > 0, row < tiles_y - 1),
+        ramp(xmin, xmax, width, column > 0, column < tiles_x - 1),
+    )
+
+    return (slice(ymin, ymax), slice(xmin, xmax)), weight[:, :, None]
+
+
+def read_tile(path: str, width: int, height: int) -> numpy.ndarray:
+    """Read the linear RGBA pixels of a rendered tile, bottom row first like in the frame"""
+
+    image = bpy.data.images.load(path)
+    try:
+        if tuple(image.size) != (width, height):
+            raise ValueError(f"Tile {path} is {tuple(image.size)} pixels, expected {(width, height)}")
+
+        pixels = numpy.empty(width * height * 4, dtype=numpy.float32)
+        image.pixels.foreach_get(pixels)
+    finally:
+        bpy.data.images.remove(image)
+
+    return numpy.reshape(pixels, (height, width, 4))
+
+
+def stitch_tiles(paths: List[str], tiles_x: int, tiles_y: int, output_path: str) -> None:
+    """
+    Stitch the rendered tiles of a frame together, saving the frame with the scene's output settings.
+
+    :param paths: Path of every tile's EXR, in tile order.
+    :param output_path: Path of the frame, without its extension.
+    """
+
+    scene = bpy.context.scene
+    width, height = resolution(scene)
+    total = numpy.zeros((height, width, 4), dtype=numpy.float32)
+    weights = numpy.zeros((height, width, 1), dtype=numpy.float32)
+
+    # Blend every tile in
+    for index, path in enumerate(paths):
+        region, weight = tile_region(index, tiles_x, tiles_y, width, height)
+        total[region] += read_tile(path, weight.shape[1], weight.shape[0]) * weight
+        weights[region] += weight
+
+    # Save the frame, applying the scene's color management and file format
+    frame = bpy.data.images.new("stitched", width, height, alpha=True, float_buffer=True)
+    frame.pixels.foreach_set((total / numpy.maximum(weights, 1e-6)).ravel())
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    frame.save_render(output_path + scene.render.file_extension, scene=scene)
+
+    print(f"Stitched {len(paths)} tiles into {output_path + scene.render.file_extension}")
@@ -0,0 +1,65 @@
+"""
+Settings and progress logging of S3 transfers.
+"""
+
+from threading import Lock
+import time
+import os
+
+from boto3.s3.transfer import TransferConfig
+import typer
+
+# Size of a megabyte
+MB = 1024 * 1024
+
+# Multipart transfer settings, used to download blend files with parallel ranged requests and upload outputs. Clients
+# check whether outputs changed by their ETag, assuming they were uploaded in parts of the default size
+TRANSFER_PART_SIZE = int(os.environ.get("TRANSFER_PART_MB", "64")) * MB
+TRANSFER_CONCURRENCY = int(os.environ.get("TRANSFER_CONCURRENCY", "16"))
+
+# Seconds between progress log lines
+LOG_INTERVAL = 5.0
+
+transfer_config = TransferConfig(
+    multipart_threshold=TRANSFER_PART_SIZE,
+    multipart_chunksize=TRANSFER_PART_SIZE,
+    max_concurrency=TRANSFER_CONCURRENCY,
+)
+
+
+class TransferLog:
+    """
+    Byte counter passed as the Callback of S3 transfers. It logs the progress and throughput of the transfer
+    periodically, and once it is done.
+    """
+
+    def __init__(self, label: str, total: int):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.start_time = time.monotonic()
+        self.logged_at = self.start_time
+        self.lock = Lock()
+
+    def __call__(self, bytes_amount: int) -> None:
+        with self.lock:
+            self.done += bytes_amount
+
+            now = time.monotonic()
+            if now - self.logged_at >= LOG_INTERVAL:
+                self.logged_at = now
+                self.log()
+
+    @property
+    def throughput(self) -> float:
+        """Transfer throughput in MB/s"""
+
+        return self.done / MB / max(time.monotonic() - self.start_time, 1e-6)
+
+    def log(self) -> None:
+        """Log the progress of the transfer"""
+
+        typer.echo(
+            f"{self.label}: {self.done / MB:.1f}/{self.total / MB:.1f} MB in "
+            f"{time.monotonic() - self.start_time:.1f}s ({self.throughput:.1f} MB/s)"
+        )